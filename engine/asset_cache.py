@@ -0,0 +1,109 @@
+import pygame
+from collections import OrderedDict
+
+# shared image cache for every state
+# keys: ("image", path), ("scaled", path, size), ("frame", path, rect, size)
+# least recently used entries are dropped when the byte budget is exceeded
+
+DEFAULT_BUDGET = 64 * 1024 * 1024
+
+
+def surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+class AssetCache:
+    def __init__(self, budget_bytes=DEFAULT_BUDGET):
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self.entries = OrderedDict()
+
+        # counters for profiling
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # look up a key and mark it as most recently used
+    def _get(self, key):
+        surface = self.entries.get(key)
+        if surface is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return surface
+
+    # store a surface and evict least recently used entries over budget
+    def _put(self, key, surface):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.used_bytes -= surface_bytes(old)
+        self.entries[key] = surface
+        self.used_bytes += surface_bytes(surface)
+
+        while self.used_bytes > self.budget_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.used_bytes -= surface_bytes(evicted)
+            self.evictions += 1
+        return surface
+
+    # decoded and converted image, loaded from disk only once
+    def image(self, path):
+        key = ("image", path)
+        surface = self._get(key)
+        if surface is None:
+            surface = self._put(key, pygame.image.load(path).convert_alpha())
+        return surface
+
+    # image decoded elsewhere (e.g. the preloader thread), converted here on the main thread
+    def add_decoded(self, path, surface):
+        return self._put(("image", path), surface.convert_alpha())
+
+    # image scaled to a fixed size
+    def scaled(self, path, size):
+        size = (int(size[0]), int(size[1]))
+        key = ("scaled", path, size)
+        surface = self._get(key)
+        if surface is None:
+            surface = self._put(key, pygame.transform.scale(self.image(path), size))
+        return surface
+
+    # one frame of a sprite sheet, optionally scaled
+    # the frame is copied so it stays valid when the sheet gets evicted
+    def frame(self, path, rect, size=None):
+        rect = tuple(pygame.Rect(rect))
+        if size is not None:
+            size = (int(size[0]), int(size[1]))
+        key = ("frame", path, rect, size)
+        surface = self._get(key)
+        if surface is None:
+            surface = self.image(path).subsurface(rect).copy()
+            if size is not None:
+                surface = pygame.transform.scale(surface, size)
+            surface = self._put(key, surface)
+        return surface
+
+    # all frames of a horizontal strip sheet
+    def strip(self, path, frames_count, size=None):
+        sheet = self.image(path)
+        frame_w = sheet.get_width() // frames_count
+        frame_h = sheet.get_height()
+        return [self.frame(path, (i * frame_w, 0, frame_w, frame_h), size) for i in range(frames_count)]
+
+    def clear(self):
+        self.entries.clear()
+        self.used_bytes = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "used_bytes": self.used_bytes,
+            "budget_bytes": self.budget_bytes,
+        }
+
+
+# shared instance used by every state
+assets = AssetCache()
@@ -0,0 +1,26 @@
+import pygame
+
+# view onto a world that is larger than the screen, kept centred on a target
+# and clamped to the world edges
+
+
+class Camera:
+    def __init__(self, view_size, world_size):
+        self.rect = pygame.Rect((0, 0), view_size)
+        self.world = pygame.Rect((0, 0), world_size)
+
+    def follow(self, x, y):
+        self.rect.center = (int(x), int(y))
+        # a world smaller than the view stays at the top left
+        self.rect.right = min(self.rect.right, self.world.right)
+        self.rect.bottom = min(self.rect.bottom, self.world.bottom)
+        self.rect.left = max(self.rect.left, self.world.left)
+        self.rect.top = max(self.rect.top, self.world.top)
+
+    # screen offset to add to world positions
+    @property
+    def offset(self):
+        return -self.rect.x, -self.rect.y
+
+    def visible(self, rect):
+        return self.rect.colliderect(rect)
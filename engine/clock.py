@@ -0,0 +1,69 @@
+import pygame
+
+# fixed timestep simulation clock
+# the main loop feeds the real time that passed every rendered frame, the clock turns it into
+# a whole number of fixed simulation steps and keeps the rest for the next frame.
+# game logic (movement, animations, spin timers, loan deadlines) only sees the simulation time,
+# so it runs at the same speed whatever the render rate is.
+
+SIM_RATE = 60
+
+
+class GameClock:
+    step_ms = 1000 / SIM_RATE
+    # steps per frame are capped so a long stall does not snowball (the rest is dropped)
+    max_steps = 5
+
+    def __init__(self):
+        self.last_real = None
+        self.reset()
+
+    # restart the simulation time at zero (used when a recording or replay starts)
+    def reset(self):
+        self.steps = 0
+        self.accumulator = 0.0
+        # how far the renderer is between the previous and the current step (0..1)
+        self.alpha = 0.0
+
+    @property
+    def step_seconds(self):
+        return self.step_ms / 1000
+
+    # real milliseconds since the previous frame
+    def frame_ms(self, real_ms=None):
+        real_ms = pygame.time.get_ticks() if real_ms is None else real_ms
+        elapsed = 0 if self.last_real is None else real_ms - self.last_real
+        self.last_real = real_ms
+        return elapsed
+
+    # add real time and return how many simulation steps to run this frame
+    def advance(self, elapsed_ms):
+        self.accumulator += elapsed_ms
+        n = int(self.accumulator // self.step_ms)
+        if n > self.max_steps:
+            n = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= n * self.step_ms
+        self.alpha = self.accumulator / self.step_ms
+        return n
+
+    def step(self):
+        self.steps += 1
+
+    # move the simulation time on without running steps, used after the game slept
+    # on an idle screen where the steps would not have changed anything
+    def skip(self, elapsed_ms):
+        self.accumulator += elapsed_ms
+        n = int(self.accumulator // self.step_ms)
+        self.steps += n
+        self.accumulator -= n * self.step_ms
+        self.alpha = self.accumulator / self.step_ms
+
+    # simulation time in milliseconds
+    def ticks(self):
+        return int(self.steps * self.step_ms)
+
+
+# shared instance used by every state
+game_clock = GameClock()
@@ -0,0 +1,76 @@
+import pygame
+
+# dirty rectangle tracking for screens where almost nothing moves
+# a state keeps one DirtyRects and reports what it drew with track(name, key, rect)
+# only regions whose key changed since the last frame are sent to the display
+
+
+class DirtyRects:
+    # fall back to a full flip above this many rects or this share of the screen
+    max_rects = 24
+    max_coverage = 0.5
+
+    def __init__(self):
+        self.rects = []
+        self.full = True
+        # last key and rect per tracked region
+        self.regions = {}
+        # debug outlines of the last presented frame, they are presented again (without the
+        # outline) next frame so they do not stay on the display
+        self.outlined = []
+        self.debug = False
+
+    # force a full redraw next frame (first frame, state re-entered, resize)
+    def mark_full(self):
+        self.full = True
+        self.regions.clear()
+
+    def mark(self, rect):
+        if rect is not None:
+            self.rects.append(pygame.Rect(rect))
+
+    # mark a region dirty only when what is drawn in it changed
+    # both the old and the new rect are marked so shrinking text gets cleared
+    def track(self, name, key, rect=None):
+        old = self.regions.get(name)
+        if old is not None and old[0] == key:
+            return
+        if old is not None and old[1] != rect:
+            self.mark(old[1])
+        self.mark(rect)
+        self.regions[name] = (key, None if rect is None else pygame.Rect(rect))
+
+    def clear(self):
+        self.rects = []
+        self.full = False
+
+    # send the dirty regions (or the whole screen) to the display
+    def present(self, screen, debug=False):
+        # turning debug off presents everything once to wipe the outlines
+        if self.debug and not debug:
+            self.full = True
+        self.debug = debug
+
+        screen_rect = screen.get_rect()
+        rects = [r.clip(screen_rect) for r in self.rects]
+        rects = [r for r in rects if r.w and r.h]
+
+        area = sum(r.w * r.h for r in rects)
+        if self.full or len(rects) > self.max_rects or area > screen_rect.w * screen_rect.h * self.max_coverage:
+            outlined = []
+            if debug:
+                pygame.draw.rect(screen, (255, 0, 255), screen_rect, 4)
+                # the four edges of the border
+                w, h = screen_rect.size
+                outlined = [pygame.Rect(0, 0, w, 4), pygame.Rect(0, h - 4, w, 4), pygame.Rect(0, 0, 4, h), pygame.Rect(w - 4, 0, 4, h)]
+            pygame.display.flip()
+        else:
+            outlined = list(rects) if debug else []
+            for r in outlined:
+                pygame.draw.rect(screen, (255, 0, 255), r, 1)
+            # the outlines of the last frame are covered by what was drawn this frame
+            rects += [r for r in self.outlined if r not in rects]
+            if rects:
+                pygame.display.update(rects)
+        self.outlined = outlined
+        self.clear()
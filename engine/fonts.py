@@ -0,0 +1,54 @@
+import pygame
+from collections import OrderedDict
+
+# shared font registry and rendered text cache
+# fonts are created once per (face, size), rendered strings are kept in an LRU cache
+# keyed by (text, face, size, color, antialias) and reused across frames and states
+
+
+class FontCache:
+    def __init__(self, max_texts=512):
+        self.max_texts = max_texts
+        self.fonts = {}
+        self.texts = OrderedDict()
+
+        # counters for profiling
+        self.hits = 0
+        self.misses = 0
+
+    # font for a face (None = pygame default font) and size
+    def get(self, size, face=None):
+        key = (face, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.Font(face, size)
+            self.fonts[key] = font
+        return font
+
+    # rendered text surface, only rasterized the first time it is asked for
+    def render(self, text, size, color, face=None, antialias=True):
+        key = (text, face, size, tuple(color), antialias)
+        surface = self.texts.get(key)
+        if surface is not None:
+            self.texts.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.get(size, face).render(text, antialias, color)
+        self.texts[key] = surface
+        if len(self.texts) > self.max_texts:
+            self.texts.popitem(last=False)
+        return surface
+
+    def stats(self):
+        return {
+            "fonts": len(self.fonts),
+            "texts": len(self.texts),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# shared instance used by every state
+fonts = FontCache()
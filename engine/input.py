@@ -0,0 +1,43 @@
+import pygame
+
+# keyboard state for continuous input (movement)
+# live play reads pygame.key.get_pressed(), a replay sets the recorded keys instead
+
+# keys whose held state is recorded, in bit order
+WATCHED_KEYS = (
+    pygame.K_z, pygame.K_UP, pygame.K_s, pygame.K_DOWN,
+    pygame.K_q, pygame.K_LEFT, pygame.K_d, pygame.K_RIGHT,
+)
+
+
+# held keys from a bitmask over WATCHED_KEYS, indexable like pygame.key.get_pressed()
+class PressedKeys:
+    def __init__(self, mask=0):
+        self.keys = {key for bit, key in enumerate(WATCHED_KEYS) if mask & (1 << bit)}
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+
+class InputState:
+    def __init__(self):
+        # PressedKeys during a replay, None for the real keyboard
+        self.pressed = None
+
+    def get_pressed(self):
+        if self.pressed is not None:
+            return self.pressed
+        return pygame.key.get_pressed()
+
+    # held watched keys as a bitmask, for recording
+    def pressed_mask(self):
+        keys = self.get_pressed()
+        mask = 0
+        for bit, key in enumerate(WATCHED_KEYS):
+            if keys[key]:
+                mask |= 1 << bit
+        return mask
+
+
+# shared instance used by the player
+input_state = InputState()
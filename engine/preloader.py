@@ -0,0 +1,72 @@
+import os
+import queue
+import threading
+import time
+import pygame
+from engine.asset_cache import assets
+
+# decodes every png under assets/ on a worker thread
+# the decoded surfaces are handed to the main thread, which converts them for the
+# display (convert_alpha must run there) and stores them in the asset cache
+# folders in `exclude` are skipped, their images are loaded when they are needed
+
+
+class Preloader:
+    def __init__(self, root="assets", cache=assets, exclude=()):
+        self.cache = cache
+        self.paths = []
+        exclude = {os.path.normpath(folder) for folder in exclude}
+        for folder, subfolders, files in os.walk(root):
+            subfolders[:] = [name for name in subfolders if os.path.normpath(os.path.join(folder, name)) not in exclude]
+            for name in sorted(files):
+                if name.lower().endswith(".png"):
+                    # same path strings the states use, e.g. "assets/background/bank_tile.png"
+                    self.paths.append(os.path.join(folder, name).replace(os.sep, "/"))
+        self.paths.sort()
+
+        self.decoded = queue.Queue()
+        self.loaded = 0
+        self.thread = threading.Thread(target=self._decode_all, daemon=True)
+        self.start_time = None
+        self.end_time = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self.thread.start()
+
+    # worker thread: decode only, no display access
+    def _decode_all(self):
+        for path in self.paths:
+            try:
+                self.decoded.put((path, pygame.image.load(path)))
+            except (pygame.error, OSError) as e:
+                self.decoded.put((path, e))
+
+    # main thread: convert decoded surfaces for at most budget_ms per frame
+    def pump(self, budget_ms=4):
+        deadline = time.perf_counter() + budget_ms / 1000
+        while time.perf_counter() < deadline:
+            try:
+                path, surface = self.decoded.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(surface, Exception):
+                print(f"Could not load {path}: {surface}")
+            else:
+                self.cache.add_decoded(path, surface)
+            self.loaded += 1
+
+        if self.done() and self.end_time is None:
+            self.end_time = time.perf_counter()
+
+    def done(self):
+        return self.loaded >= len(self.paths)
+
+    def progress(self):
+        return self.loaded / len(self.paths) if self.paths else 1.0
+
+    def elapsed_ms(self):
+        if self.start_time is None:
+            return 0
+        end = self.end_time if self.end_time is not None else time.perf_counter()
+        return (end - self.start_time) * 1000
@@ -0,0 +1,146 @@
+import csv
+import os
+import time
+from collections import deque
+import pygame
+from engine.fonts import fonts
+
+# frame time profiler with an in-game overlay
+# the main loop times its phases (handle_event, update, draw, present) per frame and
+# any code can add its own section with `with profiler.section("name"):`
+
+FRAME_BUDGET_MS = 1000 / 60
+
+
+class _Section:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        ms = (time.perf_counter() - self.start) * 1000
+        sections = self.profiler.sections
+        sections[self.name] = sections.get(self.name, 0.0) + ms
+        return False
+
+
+class FrameProfiler:
+    # frames shown in the graph and frames kept for the csv export
+    graph_frames = 240
+    max_records = 36000
+
+    def __init__(self, budget_ms=FRAME_BUDGET_MS):
+        self.budget_ms = budget_ms
+        self.visible = False
+        # true for the one frame after the overlay was hidden, its panel has to be presented
+        # once more to clear it
+        self.was_visible = False
+        self.just_hidden = False
+
+        # one record per frame: (state, frame interval ms, work ms, sections)
+        self.records = deque(maxlen=self.max_records)
+        self.sections = {}
+        self.state_name = None
+        self.frame_start = None
+        self.last_frame_start = None
+        self.work_ms = 0.0
+        self.over_budget = 0
+
+    def section(self, name):
+        return _Section(self, name)
+
+    def begin_frame(self, state_name):
+        now = time.perf_counter()
+        self.last_frame_start = self.frame_start
+        self.frame_start = now
+        self.state_name = state_name
+        self.sections = {}
+
+    # work_ms is the time spent in the timed phases, the interval also includes waiting
+    def end_frame(self, phases=("handle_event", "update", "draw", "present")):
+        interval = 0.0
+        if self.last_frame_start is not None:
+            interval = (self.frame_start - self.last_frame_start) * 1000
+        self.work_ms = sum(self.sections.get(name, 0.0) for name in phases)
+        if self.work_ms > self.budget_ms:
+            self.over_budget += 1
+        self.records.append((self.state_name, interval, self.work_ms, self.sections))
+
+    # p50/p95/p99 of the work time over the last frames
+    def percentiles(self, frames=None):
+        frames = frames or self.graph_frames
+        recent = sorted(record[2] for record in list(self.records)[-frames:])
+        if not recent:
+            return 0.0, 0.0, 0.0
+        pick = lambda q: recent[min(len(recent) - 1, int(q * len(recent)))]
+        return pick(0.50), pick(0.95), pick(0.99)
+
+    # average time per section for one state over the last frames
+    def state_breakdown(self, state_name, frames=60):
+        totals = {}
+        count = 0
+        for name, _, _, sections in list(self.records)[-frames:]:
+            if name != state_name:
+                continue
+            count += 1
+            for section, ms in sections.items():
+                totals[section] = totals.get(section, 0.0) + ms
+        return {section: ms / count for section, ms in totals.items()} if count else {}
+
+    def export_csv(self, path=None):
+        if path is None:
+            os.makedirs("profiles", exist_ok=True)
+            path = time.strftime("profiles/frame_times_%Y%m%d_%H%M%S.csv")
+        names = sorted({section for record in self.records for section in record[3]})
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "state", "interval_ms", "work_ms", "over_budget"] + names)
+            for i, (state, interval, work, sections) in enumerate(self.records):
+                writer.writerow([i, state, f"{interval:.3f}", f"{work:.3f}", int(work > self.budget_ms)]
+                                + [f"{sections.get(name, 0.0):.3f}" for name in names])
+        return path
+
+    def draw(self, screen):
+        self.just_hidden = self.was_visible and not self.visible
+        self.was_visible = self.visible
+        if not self.visible:
+            return
+
+        panel = pygame.Rect(screen.get_width() - 330, 10, 320, 250)
+        overlay = pygame.Surface(panel.size, pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 190))
+        screen.blit(overlay, panel.topleft)
+
+        # rolling frame time graph, 2x the budget is the top of the graph
+        graph = pygame.Rect(panel.x + 10, panel.y + 10, 300, 80)
+        scale = graph.h / (2 * self.budget_ms)
+        recent = list(self.records)[-self.graph_frames:]
+        bar_w = graph.w / self.graph_frames
+        for i, record in enumerate(recent):
+            work = record[2]
+            h = min(graph.h, int(work * scale))
+            color = (230, 60, 60) if work > self.budget_ms else (80, 200, 120)
+            pygame.draw.line(screen, color, (graph.x + i * bar_w, graph.bottom), (graph.x + i * bar_w, graph.bottom - h))
+        budget_y = graph.bottom - int(self.budget_ms * scale)
+        pygame.draw.line(screen, (255, 215, 0), (graph.x, budget_y), (graph.right, budget_y))
+
+        p50, p95, p99 = self.percentiles()
+        lines = [
+            (f"{self.state_name}  work {self.work_ms:.2f} ms", (255, 255, 255)),
+            (f"p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f} ms", (255, 255, 255)),
+            (f"over {self.budget_ms:.1f} ms budget: {self.over_budget} frames", (255, 120, 120) if self.over_budget else (200, 200, 200)),
+        ]
+        for section, ms in sorted(self.state_breakdown(self.state_name).items()):
+            lines.append((f"  {section}: {ms:.2f} ms", (200, 200, 200)))
+        y = graph.bottom + 8
+        for text, color in lines[:9]:
+            screen.blit(fonts.render(text, 20, color), (panel.x + 10, y))
+            y += 16
+
+
+# shared instance used by the main loop and by components that time themselves
+profiler = FrameProfiler()
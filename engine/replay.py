@@ -0,0 +1,84 @@
+import hashlib
+import struct
+import pygame
+
+# compact binary session log for reproducing a game exactly
+#
+# header:  b"CREC", version (u16), rng seed (u64)
+# frame:   0x01, real frame time in ms (u32), held keys bitmask (u16), event count (u8), events
+# event:   type code (u8), key (u32)
+# end:     0x02, frame count (u32), 8 byte digest of the final game outcome
+
+MAGIC = b"CREC"
+VERSION = 3
+FRAME_TAG = 1
+END_TAG = 2
+
+HEADER = struct.Struct("<4sHQ")
+FRAME = struct.Struct("<IHB")
+EVENT = struct.Struct("<BI")
+END = struct.Struct("<I8s")
+
+# only these events influence the game
+EVENT_CODES = {pygame.QUIT: 0, pygame.KEYDOWN: 1, pygame.KEYUP: 2}
+EVENT_TYPES = {code: event_type for event_type, code in EVENT_CODES.items()}
+
+
+# digest of what a session ended with, compared after a replay
+def outcome_digest(*values):
+    return hashlib.blake2b("|".join(map(str, values)).encode(), digest_size=8).digest()
+
+
+class Recorder:
+    def __init__(self, path, seed):
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed))
+        self.frames = 0
+
+    def record_frame(self, frame_ms, pressed_mask, events):
+        events = [e for e in events if e.type in EVENT_CODES][:255]
+        self.file.write(bytes([FRAME_TAG]) + FRAME.pack(frame_ms, pressed_mask, len(events)))
+        for event in events:
+            self.file.write(EVENT.pack(EVENT_CODES[event.type], getattr(event, "key", 0)))
+        self.frames += 1
+
+    def close(self, digest):
+        self.file.write(bytes([END_TAG]) + END.pack(self.frames, digest))
+        self.file.close()
+
+
+class Replayer:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = f.read()
+        magic, version, self.seed = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a session recording")
+        if version != VERSION:
+            raise ValueError(f"{path} has version {version}, expected {VERSION}")
+        self.offset = HEADER.size
+        self.frames = 0
+        # filled in when the end record is reached
+        self.recorded_frames = None
+        self.recorded_digest = None
+
+    # (frame time ms, held keys bitmask, events) for the next frame, None at the end of the log
+    def next_frame(self):
+        if self.offset >= len(self.data):
+            return None
+        tag = self.data[self.offset]
+        self.offset += 1
+        if tag == END_TAG:
+            self.recorded_frames, self.recorded_digest = END.unpack_from(self.data, self.offset)
+            self.offset = len(self.data)
+            return None
+
+        frame_ms, pressed_mask, count = FRAME.unpack_from(self.data, self.offset)
+        self.offset += FRAME.size
+        events = []
+        for _ in range(count):
+            code, key = EVENT.unpack_from(self.data, self.offset)
+            self.offset += EVENT.size
+            events.append(pygame.event.Event(EVENT_TYPES[code], key=key))
+        self.frames += 1
+        return frame_ms, pressed_mask, events
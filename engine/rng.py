@@ -0,0 +1,110 @@
+import bisect
+import itertools
+import zlib
+import numpy as np
+
+# independent random streams for the game tables
+# every stream has its own PCG64 generator derived from the session seed and the stream
+# name, so one table's draws never change what another table gets and the order in which
+# tables are opened does not matter. a session with the same seed replays the same.
+# draws come out of a prefetched block of uniform floats, a single draw is a list index and
+# the generator is only called once per block.
+
+BLOCK_SIZE = 4096
+
+
+class Stream:
+    def __init__(self, name, seed_seq, block_size=BLOCK_SIZE):
+        self.name = name
+        self.bit_generator = np.random.PCG64(seed_seq)
+        # for bulk draws (simulations), these do not go through the block
+        self.generator = np.random.Generator(self.bit_generator)
+        self.block_size = block_size
+        self.block = []
+        self.index = 0
+        self.blocks = 0
+        self.draws = 0
+        # generator state the current block was drawn from (the next block before the first
+        # draw), with the index this is enough to reproduce every following draw
+        self.block_state = self.bit_generator.state
+
+    def refill(self):
+        self.block_state = self.bit_generator.state
+        # python floats, indexing a list is cheaper than pulling numpy scalars
+        self.block = self.generator.random(self.block_size).tolist()
+        self.index = 0
+        self.blocks += 1
+
+    # uniform float in [0, 1)
+    def random(self):
+        if self.index >= len(self.block):
+            self.refill()
+        value = self.block[self.index]
+        self.index += 1
+        self.draws += 1
+        return value
+
+    # integer in [0, n), n is small (wheel pockets, cards) so the float has plenty of bits
+    def below(self, n):
+        return int(self.random() * n)
+
+    def choice(self, seq):
+        return seq[self.below(len(seq))]
+
+    def weighted_choice(self, population, weights):
+        cumulative = list(itertools.accumulate(weights))
+        return population[bisect.bisect_right(cumulative, self.random() * cumulative[-1])]
+
+    # fisher-yates in place, same interface as random.shuffle
+    def shuffle(self, items):
+        for i in range(len(items) - 1, 0, -1):
+            j = self.below(i + 1)
+            items[i], items[j] = items[j], items[i]
+
+    # position of the stream for the audit log
+    def state(self):
+        return {
+            "name": self.name,
+            "draws": self.draws,
+            "block": self.blocks,
+            "index": self.index,
+            "block_state": self.block_state,
+        }
+
+    # continue from a position written by state()
+    def restore(self, state):
+        self.bit_generator.state = state["block_state"]
+        self.block_state = state["block_state"]
+        self.block = []
+        self.index = 0
+        # a stream that has not drawn yet has no block, the first draw refills
+        if state["block"] > 0:
+            self.refill()
+            self.index = state["index"]
+        self.blocks = state["block"]
+        self.draws = state["draws"]
+
+
+class RandomService:
+    def __init__(self, seed=None):
+        self.seed(seed)
+
+    # new session, all streams start over from this seed
+    def seed(self, seed=None):
+        # without a seed fresh entropy is used, it is kept so the session can be audited
+        self.entropy = np.random.SeedSequence(seed).entropy
+        self.streams = {}
+
+    def stream(self, name):
+        stream = self.streams.get(name)
+        if stream is None:
+            # the name is part of the key, not the creation order
+            seed_seq = np.random.SeedSequence(self.entropy, spawn_key=(zlib.crc32(name.encode()),))
+            stream = self.streams[name] = Stream(name, seed_seq)
+        return stream
+
+    def audit(self):
+        return {"entropy": self.entropy, "streams": {name: s.state() for name, s in self.streams.items()}}
+
+
+rng = RandomService()
@@ -0,0 +1,140 @@
+import os
+import struct
+import threading
+import zlib
+from collections import namedtuple
+
+# player sessions on disk as one small binary record
+#
+# header:  b"CSAV", version (u16)
+# body:    money (i64), loan amount (i64), loan time left in ms (i64, -1 without a loan),
+#          skin path length (u16) + utf-8 skin path
+# trailer: crc32 of header and body (u32)
+#
+# the loan is stored as time left, the loan timer is armed again when the save is loaded
+# files are written to a temporary file and renamed, a crash never leaves half a save
+
+MAGIC = b"CSAV"
+VERSION = 1
+HEADER = struct.Struct("<4sH")
+BODY = struct.Struct("<qqqH")
+CRC = struct.Struct("<I")
+
+SAVE_PATH = "saves/session.sav"
+
+# what gets saved, taken on the main thread so the writer never touches the player
+Snapshot = namedtuple("Snapshot", ["money", "loan_amount", "loan_left_ms", "sheet_path"])
+
+
+def snapshot(player):
+    loan_left = player.loan_time_left_ms() if player.loan_active() else -1
+    return Snapshot(player.money, player.loan_amount, loan_left, player.sheet_path)
+
+
+def apply(player, snap):
+    player.money = snap.money
+    player.clear_loan()
+    if snap.loan_left_ms >= 0:
+        player.set_loan(snap.loan_amount, snap.loan_left_ms)
+    if snap.sheet_path != player.sheet_path and os.path.exists(snap.sheet_path):
+        player.load_sheet(snap.sheet_path)
+
+
+def encode(snap):
+    path = snap.sheet_path.encode("utf-8")
+    data = HEADER.pack(MAGIC, VERSION) + BODY.pack(snap.money, snap.loan_amount, snap.loan_left_ms, len(path)) + path
+    return data + CRC.pack(zlib.crc32(data))
+
+
+def decode(data):
+    if len(data) < HEADER.size + BODY.size + CRC.size:
+        raise ValueError("save file is truncated")
+    magic, version = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("not a save file")
+    if version != VERSION:
+        raise ValueError(f"save file version {version}, expected {VERSION}")
+    (crc,) = CRC.unpack_from(data, len(data) - CRC.size)
+    if zlib.crc32(data[:-CRC.size]) != crc:
+        raise ValueError("save file is corrupt")
+    money, loan_amount, loan_left, path_len = BODY.unpack_from(data, HEADER.size)
+    start = HEADER.size + BODY.size
+    path = data[start:start + path_len].decode("utf-8")
+    return Snapshot(money, loan_amount, loan_left, path)
+
+
+def write_atomic(path, data):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# the saved session, None when there is none or it cannot be read
+def load(path=SAVE_PATH):
+    try:
+        with open(path, "rb") as f:
+            return decode(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Could not load {path}: {e}")
+        return None
+
+
+# writes snapshots on a background thread
+# only the newest snapshot is kept, requests made while a write is running are
+# coalesced into one write afterwards
+class Autosaver:
+    def __init__(self, path=SAVE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.wake = threading.Condition(self.lock)
+        self.pending = None
+        self.writing = False
+        self.running = True
+        self.writes = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def request(self, snap):
+        with self.lock:
+            self.pending = snap
+            self.wake.notify_all()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                while self.pending is None and self.running:
+                    self.wake.wait()
+                if self.pending is None:
+                    return
+                snap = self.pending
+                self.pending = None
+                self.writing = True
+            try:
+                write_atomic(self.path, encode(snap))
+                self.writes += 1
+            except OSError as e:
+                print(f"Autosave failed: {e}")
+            with self.lock:
+                self.writing = False
+                self.wake.notify_all()
+
+    # wait until every requested snapshot is on disk
+    def flush(self):
+        with self.lock:
+            while self.pending is not None or self.writing:
+                self.wake.wait()
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.running = False
+            self.wake.notify_all()
+        self.thread.join()
@@ -0,0 +1,128 @@
+import heapq
+from engine.clock import game_clock
+
+# timers on the game clock, kept in a heap ordered by due time
+# run() only touches timers that are due, so a frame costs O(expired timers) however many
+# components have something scheduled. timers can belong to a group that is paused and
+# resumed as a whole (the loan clock stops while a dialogue is open).
+# heap entries of cancelled or paused timers are not removed, they are skipped when they
+# come up because their generation no longer matches
+
+
+class Timer:
+    def __init__(self, callback, due, interval=None, group=None):
+        self.callback = callback
+        self.due = due
+        # repeating timers are rescheduled interval ms after every due time
+        self.interval = interval
+        self.group = group
+        self.generation = 0
+        self.active = True
+        # time left while the group is paused
+        self.remaining = None
+
+    @property
+    def paused(self):
+        return self.remaining is not None
+
+    def time_left(self, now=None):
+        if self.remaining is not None:
+            return self.remaining
+        return self.due - (game_clock.ticks() if now is None else now)
+
+
+class Scheduler:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # (due, sequence, generation, timer)
+        self.heap = []
+        self.sequence = 0
+        # group -> timers of that group that are still active
+        self.groups = {}
+        # group -> how many times it is paused
+        self.paused = {}
+
+    def _push(self, timer):
+        self.sequence += 1
+        heapq.heappush(self.heap, (timer.due, self.sequence, timer.generation, timer))
+
+    def call_at(self, due, callback, group=None, interval=None):
+        timer = Timer(callback, due, interval, group)
+        if group is not None:
+            self.groups.setdefault(group, set()).add(timer)
+            if self.paused.get(group):
+                timer.remaining = due - game_clock.ticks()
+                return timer
+        self._push(timer)
+        return timer
+
+    def call_later(self, delay_ms, callback, group=None):
+        return self.call_at(game_clock.ticks() + delay_ms, callback, group)
+
+    def call_every(self, interval_ms, callback, group=None):
+        return self.call_at(game_clock.ticks() + interval_ms, callback, group, interval_ms)
+
+    def cancel(self, timer):
+        if timer is None or not timer.active:
+            return
+        timer.active = False
+        timer.generation += 1
+        if timer.group is not None:
+            self.groups.get(timer.group, set()).discard(timer)
+
+    # pauses nest, a group runs again after as many resumes as pauses
+    def pause(self, group):
+        count = self.paused.get(group, 0)
+        self.paused[group] = count + 1
+        if count:
+            return
+        now = game_clock.ticks()
+        for timer in self.groups.get(group, ()):
+            timer.remaining = timer.due - now
+            timer.generation += 1
+
+    def resume(self, group):
+        count = self.paused.get(group, 0)
+        if count == 0:
+            return
+        self.paused[group] = count - 1
+        if count > 1:
+            return
+        now = game_clock.ticks()
+        for timer in self.groups.get(group, ()):
+            timer.due = now + timer.remaining
+            timer.remaining = None
+            self._push(timer)
+
+    def _valid(self, entry):
+        timer = entry[3]
+        return timer.active and entry[2] == timer.generation
+
+    # fire every timer that is due at the current game time
+    def run(self):
+        now = game_clock.ticks()
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            if not self._valid(entry):
+                continue
+            timer = entry[3]
+            if timer.interval is not None:
+                timer.due += timer.interval
+                self._push(timer)
+            else:
+                self.cancel(timer)
+            timer.callback()
+
+    # game time of the next timer, None when nothing is scheduled
+    def next_deadline(self):
+        heap = self.heap
+        while heap and not self._valid(heap[0]):
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+
+# shared instance, run by the main loop every simulation step
+scheduler = Scheduler()
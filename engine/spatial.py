@@ -0,0 +1,41 @@
+# uniform grid for finding objects near a rectangle
+# every object is stored in each cell its rect touches, a query only looks at the cells
+# under the query rect, so the cost depends on how crowded that area is and not on the
+# total number of objects
+
+
+class SpatialGrid:
+    def __init__(self, cell_size=128):
+        self.cell_size = cell_size
+        # (cell x, cell y) -> list of (rect, item)
+        self.cells = {}
+        self.count = 0
+
+    def _cells(self, rect):
+        cs = self.cell_size
+        for cy in range(rect.top // cs, (rect.bottom - 1) // cs + 1):
+            for cx in range(rect.left // cs, (rect.right - 1) // cs + 1):
+                yield cx, cy
+
+    def insert(self, rect, item):
+        entry = (rect, item)
+        for cell in self._cells(rect):
+            self.cells.setdefault(cell, []).append(entry)
+        self.count += 1
+
+    def clear(self):
+        self.cells.clear()
+        self.count = 0
+
+    # items whose rect overlaps the given rect
+    def query(self, rect):
+        found = []
+        seen = set()
+        for cell in self._cells(rect):
+            for entry in self.cells.get(cell, ()):
+                if id(entry) in seen:
+                    continue
+                seen.add(id(entry))
+                if entry[0].colliderect(rect):
+                    found.append(entry[1])
+        return found
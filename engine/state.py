@@ -0,0 +1,40 @@
+# base class for all game states
+# the main loop calls handle_event, update and draw every frame, the state manager
+# calls enter/exit when a (possibly cached) state becomes current or is left
+
+
+class State:
+    # DirtyRects tracker for states that present only changed regions
+    dirty = None
+
+    def __init__(self):
+        # tracks which screen to switch to next
+        self.next_state = None
+
+    # called every time the state becomes current, resets per-visit data
+    def enter(self):
+        self.next_state = None
+        if self.dirty is not None:
+            self.dirty.mark_full()
+
+    # called when the state is left
+    def exit(self):
+        pass
+
+    # True when nothing on screen changes until input arrives or next_deadline() passes,
+    # the main loop then sleeps instead of redrawing identical frames
+    def is_idle(self):
+        return False
+
+    # game time (ms) of the next timed change while idle, None when there is none
+    def next_deadline(self):
+        return None
+
+    def handle_event(self, event):
+        pass
+
+    def update(self):
+        pass
+
+    def draw(self, screen):
+        pass
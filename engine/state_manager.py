@@ -0,0 +1,85 @@
+# keeps one instance per state and switches between them
+# states are built by registered factories the first time they are needed and, unless
+# registered with cache=False, kept so going back to a table costs no reload
+
+
+class StateManager:
+    def __init__(self, player_factory):
+        # creates a fresh player for the first state and after a restart
+        self.player_factory = player_factory
+        self.player = None
+
+        self.factories = {}
+        self.cacheable = {}
+        self.instances = {}
+        # next_state name -> function doing the transition
+        self.transitions = {}
+
+        self.current = None
+        self.current_name = None
+
+        # states to build ahead of time, one per frame
+        self.pending = []
+
+    # factory(player) builds the state
+    def register(self, name, factory, cache=True):
+        self.factories[name] = factory
+        self.cacheable[name] = cache
+        self.transitions[name] = lambda: self.switch(name)
+
+    def add_transition(self, name, action):
+        self.transitions[name] = action
+
+    def get(self, name):
+        state = self.instances.get(name)
+        if state is None:
+            state = self.factories[name](self.player)
+            if self.cacheable[name]:
+                self.instances[name] = state
+        return state
+
+    # build and cache a state without entering it
+    def prepare(self, name):
+        if self.cacheable[name] and name not in self.instances:
+            self.instances[name] = self.factories[name](self.player)
+
+    # queue every cacheable state that is not built yet
+    def prepare_all(self):
+        self.pending = [name for name in self.factories if self.cacheable[name] and name not in self.instances]
+
+    # build at most one queued state, called once per frame so the current state keeps running
+    def pump(self):
+        while self.pending:
+            name = self.pending.pop(0)
+            if name not in self.instances:
+                self.prepare(name)
+                return
+
+    def switch(self, name):
+        if self.current is not None:
+            self.current.exit()
+        self.current = self.get(name)
+        self.current_name = name
+        self.current.enter()
+
+    # start over with a new player and no cached states
+    def start(self, name):
+        if self.current is not None:
+            self.current.exit()
+            self.current = None
+        self.instances.clear()
+        self.pending = []
+        self.player = self.player_factory()
+        self.switch(name)
+
+    # follow the next_state of the current state, returns True when the state changed
+    def apply_transition(self):
+        name = self.current.next_state
+        if not name:
+            return False
+        self.current.next_state = None
+        action = self.transitions.get(name)
+        if action is None:
+            return False
+        action()
+        return True
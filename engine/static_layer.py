@@ -0,0 +1,29 @@
+import pygame
+
+# pre-rendered background layer for things that never move (floor tiles, tables, props)
+# the build function draws onto the layer once, every frame is then a single blit
+# the layer is rebuilt only when the screen size or the layout key changes
+
+
+class StaticLayer:
+    def __init__(self, build):
+        # build(surface) draws all static content onto the given surface
+        self.build = build
+        self.surface = None
+        self.key = None
+        self.builds = 0
+
+    def invalidate(self):
+        self.key = None
+
+    def get(self, size, layout_key=None):
+        key = (tuple(size), layout_key)
+        if self.surface is None or key != self.key:
+            self.surface = pygame.Surface(size).convert()
+            self.build(self.surface)
+            self.key = key
+            self.builds += 1
+        return self.surface
+
+    def draw(self, screen, layout_key=None):
+        screen.blit(self.get(screen.get_size(), layout_key), (0, 0))
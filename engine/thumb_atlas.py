@@ -0,0 +1,114 @@
+import json
+import os
+import pygame
+
+# thumbnails of many images packed into one png on disk
+# an index next to the atlas remembers the modification time and size of every source,
+# only sources that changed are decoded again, an unchanged catalogue costs one image load
+#
+# cache/skin_thumbs.png   the atlas, `columns` thumbnails per row
+# cache/skin_thumbs.json  {"version", "size", "sources": {path: [mtime, bytes, slot]}}
+
+INDEX_VERSION = 1
+
+
+def source_stamp(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+class ThumbAtlas:
+    columns = 16
+
+    def __init__(self, sources, path, extract, size=64):
+        # extract(path) returns the surface to shrink into a thumbnail
+        self.sources = list(sources)
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + ".json"
+        self.extract = extract
+        self.size = size
+        self.surface = None
+        # slot -> subsurface, made when a cell is first shown
+        self.thumbs = {}
+        self.rebuilt = 0
+        self.load()
+
+    def slot_rect(self, slot):
+        return pygame.Rect((slot % self.columns) * self.size, (slot // self.columns) * self.size, self.size, self.size)
+
+    def read_index(self):
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION and index.get("size") == self.size:
+                return index["sources"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    # load the atlas, redrawing the thumbnails of sources that are new or changed
+    def load(self):
+        old_index = self.read_index()
+        old_atlas = None
+        if old_index and os.path.exists(self.path):
+            try:
+                old_atlas = pygame.image.load(self.path).convert_alpha()
+            except pygame.error:
+                old_index = {}
+
+        rows = max(1, (len(self.sources) + self.columns - 1) // self.columns)
+        atlas = pygame.Surface((self.columns * self.size, rows * self.size), pygame.SRCALPHA).convert_alpha()
+        index = {}
+        changed = old_atlas is None or len(old_index) != len(self.sources)
+        for slot, source in enumerate(self.sources):
+            stamp = source_stamp(source)
+            old = old_index.get(source)
+            if old is not None and old_atlas is not None and old[:2] == stamp:
+                # unchanged source, copy its thumbnail over from the old atlas
+                atlas.blit(old_atlas, self.slot_rect(slot), self.slot_rect(old[2]))
+                changed = changed or old[2] != slot
+            else:
+                thumb = pygame.transform.scale(self.extract(source), (self.size, self.size))
+                atlas.blit(thumb, self.slot_rect(slot))
+                self.rebuilt += 1
+                changed = True
+            index[source] = stamp + [slot]
+
+        self.surface = atlas
+        self.thumbs.clear()
+        if changed:
+            self.save(index)
+
+    # atlas and index are written to temporary files and renamed, a crash never leaves half a file
+    # when the cache folder is not writable the atlas is only kept in memory
+    def save(self, index):
+        try:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            tmp = self.path + ".tmp.png"
+            pygame.image.save(self.surface, tmp)
+            os.replace(tmp, self.path)
+            with open(self.index_path + ".tmp", "w") as f:
+                json.dump({"version": INDEX_VERSION, "size": self.size, "sources": index}, f)
+            os.replace(self.index_path + ".tmp", self.index_path)
+        except (pygame.error, OSError) as e:
+            print(f"Could not save {self.path}: {e}")
+
+    def __len__(self):
+        return len(self.sources)
+
+    def thumb(self, slot):
+        surface = self.thumbs.get(slot)
+        if surface is None:
+            surface = self.surface.subsurface(self.slot_rect(slot))
+            self.thumbs[slot] = surface
+        return surface
+
+
+# idle frame (facing down) of a 4x4 character sheet
+# decoded outside the shared cache, a rebuild of the whole catalogue would push out everything else
+def idle_frame(path):
+    sheet = pygame.image.load(path)
+    fw, fh = sheet.get_width() // 4, sheet.get_height() // 4
+    return sheet.subsurface((fw, 0, fw, fh))
@@ -0,0 +1,73 @@
+import json
+from collections import OrderedDict
+import pygame
+
+# floor maps and chunked rendering for floors larger than the window
+#
+# a map file is json:
+#   size:      [width, height] in pixels
+#   tile:      floor tile image, tile_size: drawn tile size in pixels
+#   door:      {"pos": [x, y], "target": state, "entrance": [x, y] where the player comes back in}
+#   objects:   [{"name", "image", "rect": [x, y, w, h], "target": state}, ...]
+#   crowd:     number of wandering NPCs (optional)
+
+
+class FloorMap:
+    def __init__(self, data):
+        self.width, self.height = data["size"]
+        self.tile = data["tile"]
+        self.tile_size = data.get("tile_size", 64)
+        door = data.get("door")
+        self.door_pos = tuple(door["pos"]) if door else None
+        self.door_target = door.get("target", "bank") if door else None
+        self.entrance = tuple(door["entrance"]) if door else None
+        self.crowd = data.get("crowd", 0)
+        self.objects = [(obj["name"], obj.get("image"), tuple(obj["rect"]), obj["target"]) for obj in data.get("objects", ())]
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+
+def load_map(path):
+    with open(path) as f:
+        return FloorMap(json.load(f))
+
+
+# the world cut into square chunks that are rendered once and kept in an lru cache
+# only the chunks under the camera are built and blitted, so the cost of a frame does not
+# depend on the size of the map
+class ChunkedLayer:
+    def __init__(self, build, chunk_size=512, max_chunks=48):
+        # build(surface, world_rect) draws the static content of world_rect onto surface
+        self.build = build
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()
+        self.builds = 0
+
+    def invalidate(self):
+        self.chunks.clear()
+
+    def get(self, cx, cy):
+        key = (cx, cy)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+
+        cs = self.chunk_size
+        chunk = pygame.Surface((cs, cs)).convert()
+        self.build(chunk, pygame.Rect(cx * cs, cy * cs, cs, cs))
+        self.builds += 1
+        self.chunks[key] = chunk
+        if len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        return chunk
+
+    # blit the chunks that overlap the camera rect
+    def draw(self, screen, view):
+        cs = self.chunk_size
+        for cy in range(view.top // cs, (view.bottom - 1) // cs + 1):
+            for cx in range(view.left // cs, (view.right - 1) // cs + 1):
+                screen.blit(self.get(cx, cy), (cx * cs - view.x, cy * cs - view.y))
@@ -1,11 +1,47 @@
+import argparse
+import os
+import random
+import time
 import pygame
-from states.casino_floor import CasinoFloor
+from states.casino_floor import CasinoFloor, Player
 from states.bank import Bank
 from states.game_over import GameOver
 from states.roulette import Roulette
 from states.blackjack import Blackjack
 from states.slot_machine import SlotMachine
 from states.wardrobe import Wardrobe
+from states.skins import SKIN_DIR
+from states.loading import Loading
+from engine.preloader import Preloader
+from engine.state_manager import StateManager
+from engine.profiler import profiler
+from engine.clock import game_clock
+from engine.scheduler import scheduler
+from engine.rng import rng
+from engine.input import PressedKeys, input_state
+from engine.replay import Recorder, Replayer, outcome_digest
+from engine import save_game
+
+# --record writes every input of a session to a file, --replay plays it back headless and as fast as possible
+parser = argparse.ArgumentParser(description="Casino")
+parser.add_argument("--record", metavar="PATH", help="record the session to this file")
+parser.add_argument("--replay", metavar="PATH", help="replay a recorded session without a window")
+parser.add_argument("--seed", type=int, default=None, help="random seed (taken from the file when replaying)")
+parser.add_argument("--fps", type=int, default=60, help="render rate cap, 0 renders as fast as possible")
+parser.add_argument("--no-save", action="store_true", help="start a new session and do not save it")
+args = parser.parse_args()
+
+replayer = Replayer(args.replay) if args.replay else None
+if replayer is not None:
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    seed = replayer.seed
+else:
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+# seeded before any state is built, the blackjack shoe shuffles on creation
+# the tables draw from their own streams (engine/rng.py), the rest uses random
+random.seed(seed)
+rng.seed(seed)
 
 # code borrowed from pygame website to start basic game
 pygame.init()
@@ -13,53 +49,192 @@ WIDTH, HEIGHT = 800, 600
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Casino")
 clock = pygame.time.Clock()
-FPS = 60
+# the game logic runs at a fixed 60 steps per second (engine/clock.py), the render rate only
+# changes how often the screen is redrawn
+RENDER_FPS = args.fps
+# on idle screens the loop sleeps until input or the next deadline, at most this long
+IDLE_MAX_WAIT_MS = 1000
+# present only changed regions on states that track them (F3 shows the dirty regions)
+USE_DIRTY_RECTS = True
+debug_dirty_rects = False
+# F1 toggles the frame time overlay, F2 exports the frame times as csv
+
+# an overdue loan ends the game wherever the player is
+def new_player():
+    player = Player()
+
+    def loan_overdue():
+        states.current.next_state = "game_over"
+
+    player.on_loan_overdue = loan_overdue
+    return player
+
+# every state is built once and reused on later visits
+states = StateManager(new_player)
+states.register("casino", lambda player: CasinoFloor(player=player))
+states.register("bank", lambda player: Bank(player=player))
+states.register("roulette", lambda player: Roulette(player=player))
+states.register("blackjack", lambda player: Blackjack(player=player))
+states.register("slot", lambda player: SlotMachine(player=player))
+states.register("wardrobe", lambda player: Wardrobe(player=player))
+states.register("game_over", lambda player: GameOver())
 
-current_state = CasinoFloor()
+# restart: new player, fresh states (built in the background, one per frame)
+def restart():
+    scheduler.clear()
+    states.start("casino")
+    states.prepare_all()
+
+states.add_transition("restart", restart)
+
+# decode all assets on a worker thread behind a loading screen
+# the skin catalogue is not preloaded, a sheet is decoded when it is equipped
+preloader = Preloader(exclude=[SKIN_DIR])
+states.register("loading", lambda player: Loading(preloader, states), cache=False)
+states.start("loading")
+
+recorder = None
+replay_start = None
+# event that woke the loop from an idle wait, handled in the next frame
+carried_events = []
+
+# the session is saved on a background thread whenever money, loan or skin change and on
+# every state switch, recorded and replayed sessions always start fresh and are not saved
+autosaver = None
+if not (args.no_save or args.record or args.replay):
+    autosaver = save_game.Autosaver()
+session_loaded = False
+last_saved = None
 
 running = True
 while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        # check for events in current state
-        if hasattr(current_state, "handle_event"):
-            current_state.handle_event(event)
-
-    # update the current state
-    if hasattr(current_state, "update"):
-        current_state.update()
-
-    # state switching
-    # check if there is a next state to change e.g from casino to bank
-    next_state = getattr(current_state, "next_state", None)
-    if next_state:
-        # check for player in current state
-        player = getattr(current_state, "player", None)
-        if next_state == "bank":
-            current_state = Bank(player=player)
-        elif next_state == "casino":
-            current_state = CasinoFloor(player=player)
-        elif next_state == "roulette":
-            current_state = Roulette(player=player)
-        elif next_state == "blackjack":
-            current_state = Blackjack(player=player)
-        elif next_state == "slot":
-            current_state = SlotMachine(player=player)
-        elif next_state == "wardrobe":
-            current_state = Wardrobe(player=player)
-        elif next_state == "game_over":
-            current_state = GameOver()
-        elif next_state == "restart":
-            current_state = CasinoFloor()
-        else:
-            pass
-    
+    profiler.begin_frame(type(states.current).__name__)
+
+    # recording and replaying start once loading is done, its length depends on the machine
+    loaded = states.current_name != "loading"
+    if loaded and args.record and recorder is None:
+        game_clock.reset()
+        recorder = Recorder(args.record, seed)
+    if loaded and replayer is not None and replay_start is None:
+        game_clock.reset()
+        replay_start = time.perf_counter()
+    # restore the saved session once loading is done, the loan deadline counts from the game time now
+    if loaded and autosaver is not None and not session_loaded:
+        session_loaded = True
+        saved = save_game.load()
+        if saved is not None:
+            save_game.apply(states.player, saved)
+
+    with profiler.section("handle_event"):
+        events = carried_events + pygame.event.get()
+        carried_events = []
+        frame_ms = game_clock.frame_ms()
+        if replay_start is not None:
+            frame = replayer.next_frame()
+            if frame is None:
+                break
+            frame_ms, pressed_mask, events = frame
+            input_state.pressed = PressedKeys(pressed_mask)
+        elif recorder is not None:
+            recorder.record_frame(frame_ms, input_state.pressed_mask(), events)
+
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                debug_dirty_rects = not debug_dirty_rects
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F1:
+                profiler.visible = not profiler.visible
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F2:
+                print(f"Frame times written to {profiler.export_csv()}")
+            # check for events in current state
+            states.current.handle_event(event)
+
+    # update the current state in fixed steps for the real time that passed
+    with profiler.section("update"):
+        # the loading screen is not part of the game, it updates once per frame
+        # so the game always starts on a fresh frame (recordings start there)
+        steps = 1 if states.current_name == "loading" else game_clock.advance(frame_ms)
+        switched = False
+        for _ in range(steps):
+            game_clock.step()
+            scheduler.run()
+            states.current.update()
+
+            # state switching
+            # check if there is a next state to change e.g from casino to bank
+            switched = states.apply_transition() or switched
+        # build one queued state, if any
+        states.pump()
+
+    # autosave, the snapshot is taken here and written on the saver thread
+    # a running loan is saved every second so a crash does not give back the time it used
+    if session_loaded:
+        player = states.player
+        loan_second = player.loan_time_left_ms() // 1000 if player.loan_active() else None
+        save_key = (id(player), player.money, player.loan_amount, loan_second, player.sheet_path)
+        if switched or save_key != last_saved:
+            last_saved = save_key
+            autosaver.request(save_game.snapshot(player))
+
     # draw the current state
-    if hasattr(current_state, "draw"):
+    current_state = states.current
+    with profiler.section("draw"):
         current_state.draw(screen)
+    profiler.draw(screen)
+
+    # present the frame, only dirty regions if the state tracks them
+    with profiler.section("present"):
+        if USE_DIRTY_RECTS and current_state.dirty is not None:
+            # the overlay changes every frame, so present everything while it is shown
+            # and once more when it is hidden
+            if profiler.visible or profiler.just_hidden:
+                current_state.dirty.mark_full()
+            current_state.dirty.present(screen, debug_dirty_rects)
+        else:
+            pygame.display.flip()
+    profiler.end_frame()
+    # replays run as fast as possible
+    if replayer is None:
+        # nothing will change on an idle screen, sleep until input or the next deadline
+        # (not while recording, the recording only knows about rendered frames)
+        state = states.current
+        if (recorder is None and not profiler.visible and not states.pending and state.next_state is None
+                and state.is_idle() and not pygame.event.peek()):
+            wait = IDLE_MAX_WAIT_MS
+            deadlines = [t for t in (scheduler.next_deadline(), state.next_deadline()) if t is not None]
+            if deadlines:
+                wait = max(0, min(wait, min(deadlines) - game_clock.ticks()))
+            if wait > 0:
+                event = pygame.event.wait(wait)
+                if event.type != pygame.NOEVENT:
+                    carried_events.append(event)
+                game_clock.skip(game_clock.frame_ms())
+        clock.tick(RENDER_FPS)
+
+# the recording can end with a quit event before its end record
+if replayer is not None:
+    while replayer.next_frame() is not None:
+        pass
+
+# last save before quitting, waits for the disk
+if session_loaded:
+    autosaver.request(save_game.snapshot(states.player))
+    autosaver.close()
 
-    pygame.display.flip()
-    clock.tick(FPS)
+frames = replayer.frames if replayer else (recorder.frames if recorder else 0)
+outcome = outcome_digest(states.player.money, states.player.loan_amount, states.current_name, frames)
+if recorder is not None:
+    recorder.close(outcome)
+    print(f"Recorded {recorder.frames} frames to {args.record} (seed {seed})")
+if replayer is not None:
+    elapsed = time.perf_counter() - (replay_start or time.perf_counter())
+    print(f"Replayed {replayer.frames} frames in {elapsed:.2f} s ({replayer.frames / max(elapsed, 1e-9):.0f} frames/s)")
+    if replayer.recorded_digest is None:
+        print("Recording has no end record, outcome not checked")
+    elif outcome == replayer.recorded_digest:
+        print("Outcome matches the recording")
+    else:
+        print("Outcome DIFFERS from the recording")
 
 pygame.quit()
@@ -1,4 +1,6 @@
 import pygame
+from engine.asset_cache import assets
+from engine.scheduler import scheduler
 
     # Herbuikbare Deur voor casino_floor en bank
     # Gebruikt een sprite sheet waar 9 frames instaan
@@ -6,34 +8,44 @@ import pygame
 class AnimatedDoor:
     def __init__(self, sheet_path, pos, frames_count=9, delay=50):
         # initialiseren van variables
-        self.sheet = pygame.image.load(sheet_path).convert_alpha()
+        self.sheet = assets.image(sheet_path)
 
         self.frames_count = frames_count
         self.frame_w = self.sheet.get_width() // frames_count
         self.frame_h = self.sheet.get_height()
 
-        self.frames = []
-        # alle frames in frames list zetten
-        for i in range(frames_count):
-            rect = pygame.Rect(i * self.frame_w, 0, self.frame_w, self.frame_h)
-            self.frames.append(self.sheet.subsurface(rect).copy())
+        # alle frames uit de gedeelde cache halen
+        self.frames = assets.strip(sheet_path, frames_count)
 
         self.frame = 0
-        self.timer = 0
         self.delay = delay
+        # loopt alleen zolang de deur beweegt
+        self.timer = None
+        self.opening = False
 
         self.rect = pygame.Rect(pos[0], pos[1], self.frame_w, self.frame_h)
 
     # deur opent als player dichtbij anders sluit hij
 
     def update(self, should_open):
-        now = pygame.time.get_ticks()
-        if now - self.timer >= self.delay:
-            self.timer = now
-            if should_open and self.frame < self.frames_count - 1:
-                self.frame += 1
-            elif not should_open and self.frame > 0:
-                self.frame -= 1
-
-    def draw(self, screen):
-        screen.blit(self.frames[self.frame], self.rect.topleft)
+        self.opening = should_open
+        if self.timer is None and self.frame != self.target_frame():
+            self.step()
+            if self.frame != self.target_frame():
+                self.timer = scheduler.call_every(self.delay, self.step)
+
+    def target_frame(self):
+        return self.frames_count - 1 if self.opening else 0
+
+    # een frame richting open of dicht, de timer stopt als de deur er is
+    def step(self):
+        if self.opening and self.frame < self.frames_count - 1:
+            self.frame += 1
+        elif not self.opening and self.frame > 0:
+            self.frame -= 1
+        if self.frame == self.target_frame():
+            scheduler.cancel(self.timer)
+            self.timer = None
+
+    def draw(self, screen, offset=(0, 0)):
+        screen.blit(self.frames[self.frame], (self.rect.x + offset[0], self.rect.y + offset[1]))
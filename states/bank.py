@@ -2,36 +2,54 @@ import pygame
 from ui.dialogue_box import DialogueBox
 from states.casino_floor import Player, SCREEN_WIDTH, SCREEN_HEIGHT
 from states.animated_door import AnimatedDoor
+from engine.asset_cache import assets
+from engine.static_layer import StaticLayer
+from engine.fonts import fonts
+from engine.state import State
 
-class Bank:
+class Bank(State):
     def __init__(self, player: Player = None):
         # initialiseren van variables
         self.player = player
-        self.player.x = 380
-        self.player.y = 520
 
         self.width = SCREEN_WIDTH
         self.height = SCREEN_HEIGHT
         self.next_state = None
-        self.dialogue = DialogueBox()
+        self.dialogue = DialogueBox(pause_group="loan")
 
         # NPC rect
         self.npc_rect = pygame.Rect(360, 200, 80, 100)
 
         # assets
-        self.tile = pygame.image.load("assets/background/bank_tile.png").convert_alpha()
-        self.tile = pygame.transform.scale(self.tile, (64, 64))
+        self.tile = assets.scaled("assets/background/bank_tile.png", (64, 64))
 
-        self.teller_img = pygame.image.load("assets/background/bank_teller.png").convert_alpha()
+        self.teller_img = assets.image("assets/background/bank_teller.png")
         self.teller_draw_size = (self.npc_rect.w, self.npc_rect.h)
 
         # deur (animated)
+        door_sheet = assets.image("assets/background/EntranceDoorAnimationSheet.png")
         self.door = AnimatedDoor(sheet_path="assets/background/EntranceDoorAnimationSheet.png",
-            pos=((SCREEN_WIDTH - (pygame.image.load("assets/background/EntranceDoorAnimationSheet.png").get_width() // 9)) // 2,
-            SCREEN_HEIGHT - pygame.image.load("assets/background/EntranceDoorAnimationSheet.png").get_height()),
+            pos=((SCREEN_WIDTH - (door_sheet.get_width() // 9)) // 2,
+            SCREEN_HEIGHT - door_sheet.get_height()),
             frames_count=9,delay=50)
 
         self.interact_padding = 20
+        # zones are inflated once instead of on every check
+        self.npc_zone = self.npc_rect.inflate(self.interact_padding, self.interact_padding)
+        self.door_zone = self.door.rect.inflate(self.interact_padding, self.interact_padding)
+        self.door_near = self.door.rect.inflate(60, 60)
+
+        # tiles and teller are baked into one background layer
+        self.static_layer = StaticLayer(self.build_static_layer)
+
+    # the player always walks in through the door
+    def enter(self):
+        super().enter()
+        self.player.place(380, 520)
+        self.dialogue.close()
+
+    def exit(self):
+        self.player.stop_animation()
 
     def handle_event(self, event):
         if self.dialogue.visible:
@@ -39,14 +57,14 @@ class Bank:
             return
 
         if event.type == pygame.KEYDOWN and event.key == pygame.K_e:
-            if self.player.rect().colliderect(self.npc_rect.inflate(self.interact_padding, self.interact_padding)):
+            if self.player.rect().colliderect(self.npc_zone):
                 self.open_npc_menu()
-            elif self.player.rect().colliderect(self.door.rect.inflate(self.interact_padding, self.interact_padding)):
-                self.player.x = 380
-                self.player.y = 40
+            elif self.player.rect().colliderect(self.door_zone):
                 self.next_state = "casino"
 
     def open_npc_menu(self):
+        # the player does not update behind the dialogue, stop the walk animation
+        self.player.stop_animation()
         lines = ["Bank Teller: Welcome! What would you like to do?"]
         choices = []
         if self.player.loan_active() == False:
@@ -77,25 +95,26 @@ class Bank:
             self.player.update(self.width, self.height)
 
         # deur open/dicht animatie
-        near_door = self.player.rect().colliderect(self.door.rect.inflate(60, 60))
+        near_door = self.player.rect().colliderect(self.door_near)
         self.door.update(near_door)
 
-        if self.player.loan_overdue():
-            self.next_state = "game_over"
-
     def draw_tiled_bg(self, screen):
         tw, th = self.tile.get_size()
         for y in range(0, self.height, th):
             for x in range(0, self.width, tw):
                 screen.blit(self.tile, (x, y))
 
-    def draw(self, screen):
+    def build_static_layer(self, surface):
         # background tiles
-        self.draw_tiled_bg(screen)
+        self.draw_tiled_bg(surface)
 
         # teller sprite
-        teller = pygame.transform.scale(self.teller_img, self.teller_draw_size)
-        screen.blit(teller, self.npc_rect.topleft)
+        teller = assets.scaled("assets/background/bank_teller.png", self.teller_draw_size)
+        surface.blit(teller, self.npc_rect.topleft)
+
+    def draw(self, screen):
+        # tiles + teller
+        self.static_layer.draw(screen, (tuple(self.npc_rect), self.teller_draw_size))
 
         # deur (animated)
         self.door.draw(screen)
@@ -104,18 +123,15 @@ class Bank:
         self.player.draw(screen)
 
         # labels + HUD
-        font = pygame.font.Font(None, 26)
-        screen.blit(font.render("Bank Teller", True, (20, 20, 20)), (self.npc_rect.x, self.npc_rect.y - 22))
+        screen.blit(fonts.render("Bank Teller", 26, (20, 20, 20)), (self.npc_rect.x, self.npc_rect.y - 22))
 
-        hud_font = pygame.font.Font(None, 28)
-        screen.blit(hud_font.render(f"Money: ${self.player.money}", True, (20, 20, 20)), (10, 10))
+        screen.blit(fonts.render(f"Money: ${self.player.money}", 28, (20, 20, 20)), (10, 10))
 
         if self.player.loan_active():
             sec_left = self.player.loan_time_left_ms() // 1000
-            screen.blit(hud_font.render(f"Loan: ${self.player.loan_amount} - Time left: {sec_left}s", True, (120, 60, 0)), (10, 30))
+            screen.blit(fonts.render(f"Loan: ${self.player.loan_amount} - Time left: {sec_left}s", 28, (120, 60, 0)), (10, 30))
 
-        help_font = pygame.font.Font(None, 20)
-        screen.blit(help_font.render("Press E to talk to the teller when near him.", True, (30, 30, 30)),
+        screen.blit(fonts.render("Press E to talk to the teller when near him.", 20, (30, 30, 30)),
                     (10, self.height - 30))
         
         self.dialogue.draw(screen)
\ No newline at end of file
@@ -1,26 +1,57 @@
 import pygame
-import random
+from concurrent.futures import ThreadPoolExecutor
 from states.casino_floor import Player, SCREEN_WIDTH, SCREEN_HEIGHT
+from states.blackjack_odds import Hand, Rules, dealer_should_hit, odds_for, settle
+from states.blackjack_shoe import Shoe
 from ui.dialogue_box import DialogueBox
+from engine.dirty_rects import DirtyRects
+from engine.fonts import fonts
+from engine.rng import rng
+from engine.state import State
 
-class Blackjack:
+# odds for big shoes can take a while, they are computed off the main thread
+odds_executor = ThreadPoolExecutor(max_workers=1)
+
+class Blackjack(State):
     def __init__(self, player: Player = None):
         # initialiseren van variables
         self.player = player
         self.width = SCREEN_WIDTH
         self.height = SCREEN_HEIGHT
         self.next_state = None
-        self.dialogue = DialogueBox()
+        self.dialogue = DialogueBox(pause_group="loan")
+
+        # table rules and exact stand/hit odds for the current hands
+        self.rules = Rules()
+        self.odds = None
+        self.odds_future = None
 
-        self.deck = [2,3,4,5,6,7,8,9,10,10,10,10,11]*4
-        self.player_hand = []
-        self.dealer_hand = []
+        # the shoe is kept between rounds until the cut card comes out
+        # and shuffled with the table's own random stream
+        self.shoe = Shoe(self.rules.num_decks, self.rules.penetration, rng.stream("blackjack"))
+        self.player_hand = Hand()
+        self.dealer_hand = Hand()
 
         self.bet_amount = 100
         self.round_active = False
 
         self.message = "Press SPACE to start a new round, ESC to exit."
 
+        # regions that changed since the last presented frame
+        self.dirty = DirtyRects()
+
+    def enter(self):
+        super().enter()
+        self.dialogue.close()
+
+    # leaving the table during a round forfeits the bet, the shoe stays as it is
+    def exit(self):
+        if self.round_active:
+            self.end_round(lost=True)
+        self.player_hand = Hand()
+        self.dealer_hand = Hand()
+        self.message = "Press SPACE to start a new round, ESC to exit."
+
     def handle_event(self, event):
         if self.dialogue.visible:
             self.dialogue.handle_event(event)
@@ -65,94 +96,131 @@ class Blackjack:
 
         self.round_active = True
         self.player.money -= self.bet_amount
-        self.deck = [2,3,4,5,6,7,8,9,10,10,10,10,11]*4
-        random.shuffle(self.deck)
-        self.player_hand = [self.deck.pop(), self.deck.pop()]
-        self.dealer_hand = [self.deck.pop(), self.deck.pop()]
+        self.shoe.start_round()
+        self.player_hand = Hand([self.shoe.draw(), self.shoe.draw()])
+        self.dealer_hand = Hand([self.shoe.draw(), self.shoe.draw()])
         self.message = "Press H to Hit, S to Stand"
 
-        if self.hand_value(self.player_hand) == 21:
-            self.end_round(won=True)
+        if self.player_hand.is_blackjack():
+            self.end_round(won=True, natural=True)
+        else:
+            self.update_odds(new_round=True)
 
 
     def player_hit(self):
         if self.round_active == False:
             return
 
-        self.player_hand.append(self.deck.pop())
+        self.player_hand.add(self.shoe.draw())
 
-        if self.hand_value(self.player_hand) > 21:
+        if self.player_hand.is_bust():
             self.end_round(lost=True)
+        else:
+            self.update_odds()
 
     def player_stand(self):
         if not self.round_active:
             return
         
         # dealer plays
-        while self.hand_value(self.dealer_hand) < 17:
-            self.dealer_hand.append(self.deck.pop())
+        while dealer_should_hit(self.dealer_hand.value, self.dealer_hand.soft, self.rules):
+            self.dealer_hand.add(self.shoe.draw())
 
         # compare hands
-        player_val = self.hand_value(self.player_hand)
-        dealer_val = self.hand_value(self.dealer_hand)
-        if dealer_val > 21 or player_val > dealer_val:
+        outcome = settle(self.player_hand, self.dealer_hand)
+        if outcome > 0:
             self.end_round(won=True)
-        elif player_val == dealer_val:
+        elif outcome == 0:
             self.end_round(tie=True)
         else:
             self.end_round(lost=True)
 
-    def hand_value(self, hand):
-        value = sum(hand)
-        # adjust for Aces
-        aces = hand.count(11)
-        while value > 21 and aces > 0:
-            value -= 10
-            aces -= 1
-        return value
-
-    def end_round(self, won=False, lost=False, tie=False):
+    # exact stand/hit odds for the cards on the table and the cards left in the shoe
+    # the hands are copied so the worker never sees cards dealt after this call
+    # a new round drops the memo tables of the last one (on the worker, between evaluations)
+    def update_odds(self, new_round=False):
+        if self.odds_future is not None:
+            self.odds_future.cancel()
+        self.odds = None
+        counts = self.shoe.remaining_counts()
+        self.odds_future = odds_executor.submit(
+            odds_for(self.rules).evaluate, Hand(self.player_hand.cards), Hand(self.dealer_hand.cards), counts, new_round)
+
+    def end_round(self, won=False, lost=False, tie=False, natural=False):
         self.round_active = False
+        if self.odds_future is not None:
+            self.odds_future.cancel()
+            self.odds_future = None
+        self.odds = None
         if won:
-            self.player.money += self.bet_amount*2
-            self.message = f"You won! You got ${self.bet_amount*2}."
+            # a natural pays blackjack_payout, a normal win pays 1:1
+            profit = int(self.bet_amount * self.rules.blackjack_payout) if natural else self.bet_amount
+            self.player.money += self.bet_amount + profit
+            self.message = f"You won! You got ${self.bet_amount + profit}."
         elif tie:
             self.player.money += self.bet_amount
             self.message = "It's a tie! Your bet is returned."
         else:
             self.message = "You lost the bet."
 
+    # idle unless the odds are still being calculated
+    def is_idle(self):
+        return self.odds_future is None
+
+    # the loan countdown in the HUD
+    def next_deadline(self):
+        return self.player.next_loan_event_ms()
+
     def update(self):
-        # loan overdue
-        if self.player.loan_overdue():
-            self.next_state = "game_over"
+        # pick up the odds once the worker is done
+        if self.odds_future is not None and self.odds_future.done():
+            self.odds = self.odds_future.result()
+            self.odds_future = None
 
     def draw(self, screen):
         # green table background
         screen.fill((43, 146, 115))  
-        font = pygame.font.Font(None, 28)
-        screen.blit(font.render("Blackjack - H: Hit, S: Stand, SPACE: New Round, ESC: Exit", True, (255,255,255)), (120, 60))
+        screen.blit(fonts.render("Blackjack - H: Hit, S: Stand, SPACE: New Round, ESC: Exit", 28, (255,255,255)), (120, 60))
         pygame.draw.rect(screen, (255,255,255), (50, 150, 700, 200), 2)
 
         # player hand
-        player_val = self.hand_value(self.player_hand)
+        player_val = self.player_hand.value
         player_text = f"Player: {', '.join(map(str, self.player_hand))} ({player_val})"
-        screen.blit(font.render(player_text, True, (255,255,255)), (60, 160))
+        self.dirty.track("player_hand", player_text, screen.blit(fonts.render(player_text, 28, (255,255,255)), (60, 160)))
 
         # dealer hand
-        dealer_val = self.hand_value(self.dealer_hand)
+        dealer_val = self.dealer_hand.value
         dealer_text = f"Dealer: {', '.join(map(str, self.dealer_hand))} ({dealer_val})"
-        screen.blit(font.render(dealer_text, True, (255,255,255)), (60, 220))
+        self.dirty.track("dealer_hand", dealer_text, screen.blit(fonts.render(dealer_text, 28, (255,255,255)), (60, 220)))
+
+        # live odds
+        odds_text = None
+        odds_rect = None
+        if self.odds is not None:
+            odds_text = (f"Stand: win {self.odds['stand_win']:.0%}, tie {self.odds['stand_push']:.0%} "
+                         f"(EV {self.odds['stand_ev']:+.2f})  |  Hit EV {self.odds['hit_ev']:+.2f}")
+            odds_rect = screen.blit(fonts.render(odds_text, 24, (200,255,200)), (60, 300))
+        elif self.odds_future is not None:
+            odds_text = "Calculating odds..."
+            odds_rect = screen.blit(fonts.render(odds_text, 24, (200,255,200)), (60, 300))
+        self.dirty.track("odds", odds_text, odds_rect)
     
         # HUD
-        screen.blit(font.render(f"Bet: ${self.bet_amount}", True, (255,255,255)), (10, 90))
-        screen.blit(font.render(f"Money: ${self.player.money}", True, (255,255,255)), (10, 10))
+        bet_text = f"Bet: ${self.bet_amount}"
+        self.dirty.track("bet", bet_text, screen.blit(fonts.render(bet_text, 28, (255,255,255)), (10, 90)))
+        money_text = f"Money: ${self.player.money}"
+        self.dirty.track("money", money_text, screen.blit(fonts.render(money_text, 28, (255,255,255)), (10, 10)))
+        loan_text = None
+        loan_rect = None
         if self.player.loan_active():
             sec_left = self.player.loan_time_left_ms()//1000
-            screen.blit(font.render(f"Loan: ${self.player.loan_amount} - Time left: {sec_left}s", True, (255,200,50)), (10, 30))
+            loan_text = f"Loan: ${self.player.loan_amount} - Time left: {sec_left}s"
+            loan_rect = screen.blit(fonts.render(loan_text, 28, (255,200,50)), (10, 30))
+        self.dirty.track("loan", loan_text, loan_rect)
 
         # start message
-        screen.blit(font.render(self.message, True, (255,255,0)), (50, 400))
+        self.dirty.track("message", self.message, screen.blit(fonts.render(self.message, 28, (255,255,0)), (50, 400)))
         
         # help message
-        self.dialogue.draw(screen)
\ No newline at end of file
+        self.dialogue.draw(screen)
+        self.dirty.track("dialogue", self.dialogue.state_key(), self.dialogue.rect)
\ No newline at end of file
@@ -0,0 +1,208 @@
+from collections import namedtuple
+
+# exact blackjack probabilities for the table rules in states/blackjack.py
+# cards are stored by value (2..10, ace = 11) and a deck composition is a tuple
+# with the number of cards left for every value in CARD_VALUES
+
+CARD_VALUES = (2, 3, 4, 5, 6, 7, 8, 9, 10, 11)
+# one 52 card deck: four of every value, sixteen tens
+DECK_COUNTS = (4, 4, 4, 4, 4, 4, 4, 4, 16, 4)
+
+# table rules, also used as cache key for the odds engines
+# blackjack_payout is the profit per unit bet for a natural (1.0 pays 1:1 like a normal win)
+# penetration is the share of the shoe dealt before the cut card
+Rules = namedtuple(
+    "Rules",
+    ["dealer_hits_soft_17", "blackjack_payout", "num_decks", "penetration"],
+    defaults=[False, 1.0, 1, 0.75],
+)
+
+# dealer final total for a bust
+BUST = 22
+
+
+# add one card to a (total, soft) pair, aces count as 11 until that would bust
+def add_card(total, soft, value):
+    total += value
+    soft_aces = int(soft) + (value == 11)
+    while total > 21 and soft_aces:
+        total -= 10
+        soft_aces -= 1
+    return total, soft_aces > 0
+
+
+def dealer_should_hit(total, soft, rules):
+    if total < 17:
+        return True
+    return total == 17 and soft and rules.dealer_hits_soft_17
+
+
+# outcome of a finished round for the player: 1 win, 0 tie, -1 lost
+def settle(player_hand, dealer_hand):
+    if player_hand.is_bust():
+        return -1
+    if dealer_hand.is_bust() or player_hand.value > dealer_hand.value:
+        return 1
+    if player_hand.value == dealer_hand.value:
+        return 0
+    return -1
+
+
+# hand with its total kept up to date while cards are dealt
+class Hand:
+    def __init__(self, cards=()):
+        self.cards = []
+        self.value = 0
+        self.soft = False
+        for card in cards:
+            self.add(card)
+
+    def add(self, card):
+        self.cards.append(card)
+        self.value, self.soft = add_card(self.value, self.soft, card)
+
+    def is_bust(self):
+        return self.value > 21
+
+    def is_blackjack(self):
+        return len(self.cards) == 2 and self.value == 21
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __iter__(self):
+        return iter(self.cards)
+
+
+# composition left after removing the given cards from the starting counts
+def remaining_counts(cards, start=DECK_COUNTS):
+    counts = list(start)
+    for card in cards:
+        counts[CARD_VALUES.index(card)] -= 1
+    return tuple(counts)
+
+
+class BlackjackOdds:
+    # memo tables are dropped when they grow past this many entries (about 490 bytes each)
+    # the keys hold the full composition so entries are rarely reused by the next round,
+    # the tables are dropped at every new round anyway. one single deck round needs up to
+    # about 80k entries, bigger shoes can go past the cap and recompute part of the round
+    max_cache_entries = 100_000
+
+    def __init__(self, rules=Rules()):
+        self.rules = rules
+        self._dealer = {}
+        self._hit = {}
+
+    def clear(self):
+        self._dealer.clear()
+        self._hit.clear()
+
+    # chance of every dealer final total ({17: p, ..., 21: p, BUST: p}) when the dealer
+    # plays out a hand with the given total from the given composition
+    def dealer_distribution(self, total, soft, counts):
+        key = (total, soft, counts)
+        dist = self._dealer.get(key)
+        if dist is not None:
+            return dist
+
+        left = sum(counts)
+        if total > 21:
+            dist = {BUST: 1.0}
+        elif not dealer_should_hit(total, soft, self.rules) or left == 0:
+            dist = {total: 1.0}
+        else:
+            dist = {}
+            for i, count in enumerate(counts):
+                if count == 0:
+                    continue
+                p = count / left
+                new_total, new_soft = add_card(total, soft, CARD_VALUES[i])
+                new_counts = counts[:i] + (count - 1,) + counts[i + 1:]
+                for final, q in self.dealer_distribution(new_total, new_soft, new_counts).items():
+                    dist[final] = dist.get(final, 0.0) + p * q
+
+        if len(self._dealer) > self.max_cache_entries:
+            self._dealer.clear()
+        self._dealer[key] = dist
+        return dist
+
+    # (win, push, lose) chances when the player stands on player_total
+    def stand_outcomes(self, player_total, dealer_total, dealer_soft, counts):
+        if player_total > 21:
+            return 0.0, 0.0, 1.0
+        win = push = lose = 0.0
+        for final, p in self.dealer_distribution(dealer_total, dealer_soft, counts).items():
+            if final == BUST or player_total > final:
+                win += p
+            elif player_total == final:
+                push += p
+            else:
+                lose += p
+        return win, push, lose
+
+    # expected profit per unit bet for standing now
+    def stand_ev(self, player_total, dealer_total, dealer_soft, counts):
+        win, _, lose = self.stand_outcomes(player_total, dealer_total, dealer_soft, counts)
+        return win - lose
+
+    # expected profit per unit bet for taking one card and then playing on optimally
+    def hit_ev(self, player_total, player_soft, dealer_total, dealer_soft, counts):
+        key = (player_total, player_soft, dealer_total, dealer_soft, counts)
+        ev = self._hit.get(key)
+        if ev is not None:
+            return ev
+
+        left = sum(counts)
+        if left == 0:
+            return self.stand_ev(player_total, dealer_total, dealer_soft, counts)
+
+        ev = 0.0
+        for i, count in enumerate(counts):
+            if count == 0:
+                continue
+            p = count / left
+            new_total, new_soft = add_card(player_total, player_soft, CARD_VALUES[i])
+            new_counts = counts[:i] + (count - 1,) + counts[i + 1:]
+            if new_total > 21:
+                ev -= p
+            else:
+                ev += p * self.best_ev(new_total, new_soft, dealer_total, dealer_soft, new_counts)
+
+        if len(self._hit) > self.max_cache_entries:
+            self._hit.clear()
+        self._hit[key] = ev
+        return ev
+
+    # value of the hand with optimal play from here on
+    def best_ev(self, player_total, player_soft, dealer_total, dealer_soft, counts):
+        stand = self.stand_ev(player_total, dealer_total, dealer_soft, counts)
+        # nothing beats standing on 21
+        if player_total >= 21:
+            return stand
+        return max(stand, self.hit_ev(player_total, player_soft, dealer_total, dealer_soft, counts))
+
+    # stand/hit figures for the hands on the table
+    def evaluate(self, player_hand, dealer_hand, counts, new_round=False):
+        if new_round:
+            self.clear()
+        win, push, lose = self.stand_outcomes(player_hand.value, dealer_hand.value, dealer_hand.soft, counts)
+        return {
+            "stand_win": win,
+            "stand_push": push,
+            "stand_lose": lose,
+            "stand_ev": win - lose,
+            "hit_ev": self.hit_ev(player_hand.value, player_hand.soft, dealer_hand.value, dealer_hand.soft, counts),
+        }
+
+
+# one engine (and memo table) per rule set
+_engines = {}
+
+
+def odds_for(rules):
+    engine = _engines.get(rules)
+    if engine is None:
+        engine = BlackjackOdds(rules)
+        _engines[rules] = engine
+    return engine
@@ -0,0 +1,93 @@
+import random
+from states.blackjack_odds import CARD_VALUES, DECK_COUNTS
+
+# multi-deck shoe with a cut card
+# cards are kept as one shuffled bytearray plus a position, the counts per value
+# and the hi-lo running count are updated in O(1) for every dealt card
+
+HI_LO = {2: 1, 3: 1, 4: 1, 5: 1, 6: 1, 7: 0, 8: 0, 9: 0, 10: -1, 11: -1}
+VALUE_INDEX = {value: i for i, value in enumerate(CARD_VALUES)}
+
+# cards that have to stay behind the cut card, enough for nearly every round to finish
+# (a longer round reshuffles the discards, see draw)
+RESERVE_CARDS = 10
+
+
+class Shoe:
+    def __init__(self, num_decks=1, penetration=0.75, rng=random):
+        if num_decks < 1:
+            raise ValueError("a shoe needs at least one deck")
+        max_penetration = 1 - RESERVE_CARDS / (52 * num_decks)
+        if not 0 < penetration <= max_penetration:
+            raise ValueError(f"penetration must be above 0 and at most {max_penetration:.3f} for {num_decks} deck(s)")
+        self.num_decks = num_decks
+        self.penetration = penetration
+        # anything with a shuffle() method, random module by default
+        self.rng = rng
+
+        self.cards = bytearray()
+        for value, count in zip(CARD_VALUES, DECK_COUNTS):
+            self.cards += bytes([value]) * (count * num_decks)
+        # cut card position, the shoe is reshuffled between rounds once it is passed
+        self.cut = int(len(self.cards) * penetration)
+
+        self.shuffles = 0
+        self.shuffle()
+
+    def shuffle(self):
+        self.rng.shuffle(self.cards)
+        self.position = 0
+        # first card of the round being dealt
+        self.round_start = 0
+        self.counts = [count * self.num_decks for count in DECK_COUNTS]
+        self.running_count = 0
+        self.shuffles += 1
+
+    # called before every deal, shuffles once the cut card is out
+    def start_round(self):
+        if self.needs_shuffle():
+            self.shuffle()
+        self.round_start = self.position
+
+    # a round that uses up the cards behind the cut card goes on with the discards of the
+    # earlier rounds, the cards on the table stay out of the new shoe
+    def reshuffle_discards(self):
+        in_play = self.cards[self.round_start:]
+        discards = self.cards[:self.round_start]
+        self.rng.shuffle(discards)
+        self.cards = in_play + discards
+        self.position = len(in_play)
+        self.round_start = 0
+        self.counts = [0] * len(CARD_VALUES)
+        for card in discards:
+            self.counts[VALUE_INDEX[card]] += 1
+        self.running_count = sum(HI_LO[card] for card in in_play)
+        self.shuffles += 1
+
+    def draw(self):
+        if self.position >= len(self.cards):
+            self.reshuffle_discards()
+        card = self.cards[self.position]
+        self.position += 1
+        self.counts[VALUE_INDEX[card]] -= 1
+        self.running_count += HI_LO[card]
+        return card
+
+    def needs_shuffle(self):
+        return self.position >= self.cut
+
+    def cards_left(self):
+        return len(self.cards) - self.position
+
+    # cards still in the shoe per value in CARD_VALUES
+    def remaining_counts(self):
+        return tuple(self.counts)
+
+    # cards dealt since the last shuffle, in order
+    def dealt(self):
+        return memoryview(self.cards)[:self.position]
+
+    # running count per deck left in the shoe
+    def true_count(self):
+        decks_left = self.cards_left() / 52
+        return self.running_count / decks_left if decks_left else 0.0
@@ -1,19 +1,58 @@
 import pygame
 from states.animated_door import AnimatedDoor
+from states.npc_crowd import Crowd
+from engine.asset_cache import assets
+from engine.tile_map import ChunkedLayer, load_map
+from engine.camera import Camera
+from engine.spatial import SpatialGrid
+from engine.fonts import fonts
+from engine.clock import game_clock
+from engine.scheduler import scheduler
+from engine.input import input_state
+from engine.state import State
 
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 
+# layout of the floor: tiles, tables, machines and the door
+FLOOR_MAP = "maps/casino_floor.json"
+
+
+# object the player can use, with its zones inflated once
+class Interactable:
+    def __init__(self, name, rect, target, image=None, padding=20, near_padding=60):
+        self.name = name
+        self.rect = pygame.Rect(rect)
+        self.target = target
+        self.image = image
+        # E works inside zone, near is the wider area for animations and prompts
+        self.zone = self.rect.inflate(padding, padding)
+        self.near = self.rect.inflate(near_padding, near_padding)
+
+
 # player class controls movement animation, and loan system
 class Player:
+    # idle column in the sprite sheet for every row
+    idle_col_for_row = {
+        0: 1,  # down idle
+        1: 1,  # right idle
+        2: 1,  # up idle
+        3: 0   # left idle
+    }
+
     def __init__(self, x=400, y=300):
         # initialize variables
         self.x = x
         self.y = y
+        # position at the previous simulation step, drawing interpolates between the two
+        self.prev_x = x
+        self.prev_y = y
 
         # player size and speed
+        self.frames = None
         self.size = 40
-        self.speed = 5
+        # pixels per second
+        self.speed = 300
 
         # load player sprite sheet
         self.sheet_path = "assets/player/player.png"
@@ -36,35 +75,39 @@ class Player:
 
         # animation variables
         self.frame = 0
-        self.frame_timer = 0
+        self.anim_timer = None
         # milliseconds between frames
         self.frame_delay = 120  
 
         # player money and loan system
         self.money = 1000
         self.loan_amount = 0
-        self.loan_deadline_ms = None
+        self.loan_timer = None
+        self.overdue = False
+        # called when the loan runs out, the game wires this to the game over screen
+        self.on_loan_overdue = None
 
     # handle keyboard input for movement
     def handle_input(self):
-        keys = pygame.key.get_pressed()
+        keys = input_state.get_pressed()
         dx = dy = 0
+        step = self.speed * game_clock.step_seconds
         self.moving = False
 
         if keys[pygame.K_z] or keys[pygame.K_UP]:
-            dy = -self.speed
+            dy = -step
             self.direction = "up"
             self.moving = True
         elif keys[pygame.K_s] or keys[pygame.K_DOWN]:
-            dy = self.speed
+            dy = step
             self.direction = "down"
             self.moving = True
         elif keys[pygame.K_q] or keys[pygame.K_LEFT]:
-            dx = -self.speed
+            dx = -step
             self.direction = "left"
             self.moving = True
         elif keys[pygame.K_d] or keys[pygame.K_RIGHT]:
-            dx = self.speed
+            dx = step
             self.direction = "right"
             self.moving = True
 
@@ -74,21 +117,31 @@ class Player:
 
     # update player animation and map limits
     def update(self, width, height):
+        self.prev_x = self.x
+        self.prev_y = self.y
         self.handle_input()
 
-        now = pygame.time.get_ticks()
         if self.moving:
-            # cycle animation frames if moving
-            if now - self.frame_timer >= self.frame_delay:
-                self.frame_timer = now
-                self.frame = (self.frame + 1) % 4
+            # cycle animation frames while moving
+            if self.anim_timer is None:
+                self.next_frame()
+                self.anim_timer = scheduler.call_every(self.frame_delay, self.next_frame)
         else:
             # reset to idle frame if not moving
-            self.frame = 0
+            self.stop_animation()
 
         self.apply_limits(width, height)
 
-    # prevent player from leaving screen
+    def next_frame(self):
+        self.frame = (self.frame + 1) % 4
+
+    def stop_animation(self):
+        scheduler.cancel(self.anim_timer)
+        self.anim_timer = None
+        self.moving = False
+        self.frame = 0
+
+    # prevent player from leaving the map
     def apply_limits(self, width, height):
         if self.x < 0:
             self.x = 0
@@ -99,31 +152,47 @@ class Player:
         if self.y + self.size > height:
             self.y = height - self.size
 
+    # changing the draw size invalidates the pre-scaled frames
+    @property
+    def size(self):
+        return self._size
+
+    @size.setter
+    def size(self, value):
+        self._size = value
+        self.frames = None
+
+    # pre-scale all 16 frames (4 directions x 4 frames) at the draw size
+    def build_frames(self):
+        self.frames = []
+        for row in range(4):
+            for col in range(4):
+                rect = (col * self.frame_w, row * self.frame_h, self.frame_w, self.frame_h)
+                self.frames.append(assets.frame(self.sheet_path, rect, (self.size, self.size)))
+
     # return the current frame image for rendering
     def get_current_image(self):
-        idle_col_for_row = {
-            0: 1,  # down idle
-            1: 1,  # right idle
-            2: 1,  # up idle
-            3: 0   # left idle
-        }
+        if self.frames is None:
+            self.build_frames()
 
         row = self.dir_row[self.direction]
-        col = self.frame if self.moving else idle_col_for_row[row]
+        col = self.frame if self.moving else self.idle_col_for_row[row]
+        return self.frames[row * 4 + col]
 
-        rect = pygame.Rect(
-            col * self.frame_w,
-            row * self.frame_h,
-            self.frame_w,
-            self.frame_h
-        )
-        return self.sheet.subsurface(rect)
+    # move without interpolating from the old position (doors, respawns)
+    def place(self, x, y):
+        self.x = self.prev_x = x
+        self.y = self.prev_y = y
 
-    # draw player to the screen
-    def draw(self, screen):
-        img = self.get_current_image()
-        img = pygame.transform.scale(img, (self.size, self.size))
-        screen.blit(img, (int(self.x), int(self.y)))
+    # position between the last two simulation steps
+    def draw_pos(self):
+        alpha = game_clock.alpha
+        return self.prev_x + (self.x - self.prev_x) * alpha, self.prev_y + (self.y - self.prev_y) * alpha
+
+    # draw player to the screen, offset moves world positions onto the screen
+    def draw(self, screen, offset=(0, 0)):
+        x, y = self.draw_pos()
+        screen.blit(self.get_current_image(), (int(x) + offset[0], int(y) + offset[1]))
 
     # return collision rectangle for player
     def rect(self):
@@ -134,35 +203,55 @@ class Player:
         if self.loan_active():
             return
         self.money += amount
+        self.set_loan(amount, duration_seconds * 1000)
+
+    # arm the loan clock, it is in the "loan" timer group that open dialogues pause
+    def set_loan(self, amount, time_left_ms):
+        self.clear_loan()
         self.loan_amount = amount
-        self.loan_deadline_ms = pygame.time.get_ticks() + duration_seconds * 1000
+        self.loan_timer = scheduler.call_later(time_left_ms, self.loan_expired, group="loan")
+
+    def loan_expired(self):
+        self.overdue = True
+        if self.on_loan_overdue is not None:
+            self.on_loan_overdue()
 
     def loan_active(self):
-        return self.loan_deadline_ms is not None
+        return self.loan_timer is not None
 
     def loan_time_left_ms(self):
         if not self.loan_active():
             return 0
-        return max(0, self.loan_deadline_ms - pygame.time.get_ticks())
+        return max(0, self.loan_timer.time_left())
 
     def loan_overdue(self):
-        return self.loan_active() and pygame.time.get_ticks() > self.loan_deadline_ms
+        return self.overdue
+
+    # game time when the loan countdown in the HUD (whole seconds) changes next
+    def next_loan_event_ms(self):
+        if not self.loan_active() or self.overdue or self.loan_timer.paused:
+            return None
+        now = game_clock.ticks()
+        return now + max(0, self.loan_timer.time_left(now)) % 1000 + 1
 
     def clear_loan(self):
+        scheduler.cancel(self.loan_timer)
         self.loan_amount = 0
-        self.loan_deadline_ms = None
+        self.loan_timer = None
+        self.overdue = False
     
     # load sprite sheet image and calculate frame dimensions
     def load_sheet(self, path: str):
         self.sheet_path = path
-        self.sheet = pygame.image.load(path).convert_alpha()
+        self.sheet = assets.image(path)
         self.frame_w = self.sheet.get_width() // 4
         self.frame_h = self.sheet.get_height() // 4
+        self.build_frames()
 
 
 # casinoFloor class controls main casino environment
-class CasinoFloor:
-    def __init__(self, player: Player = None):
+class CasinoFloor(State):
+    def __init__(self, player: Player = None, floor_map=None):
         # if no player is provided create one
         if player is not None:
             self.player = player
@@ -173,91 +262,141 @@ class CasinoFloor:
         # tracks which screen to switch to next
         self.next_state = None 
 
-        # load and scale background floor tile
-        self.floor_tile = pygame.image.load("assets/background/casino_floor_tile.png").convert_alpha()
-        self.floor_tile = pygame.transform.scale(self.floor_tile, (64, 64))
+        # the floor can be larger than the screen, the camera follows the player
+        self.map = floor_map or load_map(FLOOR_MAP)
+        self.camera = Camera((SCREEN_WIDTH, SCREEN_HEIGHT), self.map.size)
 
-        # load casino table and wardrobe images
-        self.blackjack_img = pygame.image.load("assets/background/blackjack_casino_floor.png").convert_alpha()
-        self.roulette_img = pygame.image.load("assets/background/roulette_casino_floor.png").convert_alpha()
-        self.slot_img = pygame.image.load("assets/background/slots_casino_floor.png").convert_alpha()
-        self.wardrobe_img = pygame.image.load("assets/background/wardrobe.png").convert_alpha()
+        # load and scale background floor tile
+        self.floor_tile = assets.scaled(self.map.tile, (self.map.tile_size, self.map.tile_size))
 
-        # define rectangles for interactable objects
-        self.wardrobe_rect = pygame.Rect(100, 48, 48 , 48)
-        self.blackjack_rect = pygame.Rect(90, 120, 140, 90)
-        self.roulette_rect = pygame.Rect(290, 100, 170, 120)
-        self.slot_rect = pygame.Rect(520, 90, 70, 120)
+        # tables and machines, indexed by their near zone
+        self.objects = [Interactable(name, rect, target, image) for name, image, rect, target in self.map.objects]
 
         # initialize animated door
-        self.door = AnimatedDoor(
-            "assets/background/EntranceDoorAnimationSheet.png",
-            ((SCREEN_WIDTH - (pygame.image.load("assets/background/EntranceDoorAnimationSheet.png").get_width() // 9)) // 2, 0), 9, 50)
-        
-        # extra area around objects for interaction
-        self.interact_padding = 20  
+        self.door = None
+        self.door_object = None
+        if self.map.door_pos is not None:
+            self.door = AnimatedDoor("assets/background/EntranceDoorAnimationSheet.png", self.map.door_pos, 9, 50)
+            self.door_object = Interactable("Bank", self.door.rect, self.map.door_target)
+            self.objects.append(self.door_object)
+
+        self.index = SpatialGrid()
+        for obj in self.objects:
+            self.index.insert(obj.near, obj)
+
+        # other gamblers walking around the tables
+        self.crowd = None
+        if self.map.crowd:
+            self.crowd = Crowd(self.map.crowd, self.map.size, [obj.rect for obj in self.objects])
+
+        # objects near the player and the one E would use, refreshed every update
+        self.nearby = []
+        self.focus = None
+        # where the player stands when coming back to the floor
+        self.used = None
+        self.return_pos = None
+
+        # floor, tables and wardrobe never move, they are baked into chunks around the camera
+        self.layer = ChunkedLayer(self.build_chunk)
+
+    # walking out through the door brings the player back in at the entrance,
+    # otherwise the player is back where they left the floor
+    def exit(self):
+        self.player.stop_animation()
+        if self.used is not None and self.used is self.door_object:
+            self.return_pos = self.map.entrance
+        else:
+            self.return_pos = (self.player.x, self.player.y)
+        self.used = None
+
+    def enter(self):
+        super().enter()
+        if self.return_pos is not None:
+            self.player.place(*self.return_pos)
+
+    # object whose trigger zone the player stands in, the closest one if there are several
+    def find_focus(self, player_rect, nearby):
+        best = None
+        best_dist = None
+        cx, cy = player_rect.center
+        for obj in nearby:
+            if not obj.zone.colliderect(player_rect):
+                continue
+            dist = (obj.rect.centerx - cx) ** 2 + (obj.rect.centery - cy) ** 2
+            if best is None or dist < best_dist:
+                best = obj
+                best_dist = dist
+        return best
 
     # handle player interaction events
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN and event.key == pygame.K_e:
             p = self.player.rect()
-            if p.colliderect(self.roulette_rect.inflate(self.interact_padding, self.interact_padding)):
-                self.next_state = "roulette"
-            elif p.colliderect(self.blackjack_rect.inflate(self.interact_padding, self.interact_padding)):
-                self.next_state = "blackjack"
-            elif p.colliderect(self.slot_rect.inflate(self.interact_padding, self.interact_padding)):
-                self.next_state = "slot"
-            elif p.colliderect(self.door.rect.inflate(self.interact_padding, self.interact_padding)):
-                self.next_state = "bank"
-            elif p.colliderect(self.wardrobe_rect.inflate(self.interact_padding, self.interact_padding)):
-                self.next_state = "wardrobe"
+            focus = self.find_focus(p, self.index.query(p))
+            if focus is not None:
+                self.used = focus
+                self.next_state = focus.target
 
     # update player and environment
     def update(self):
-        self.player.update(self.width, self.height)
+        self.player.update(self.map.width, self.map.height)
+
+        p = self.player.rect()
+        self.nearby = self.index.query(p)
+        self.focus = self.find_focus(p, self.nearby)
 
         # update door animation if player is nearby
-        near_door = self.player.rect().colliderect(self.door.rect.inflate(60, 60))
-        self.door.update(near_door)
+        if self.door is not None:
+            self.door.update(self.door_object in self.nearby)
 
-        # switch to game over if loan is overdue
-        if self.player.loan_overdue():
-            self.next_state = "game_over"
+        if self.crowd is not None:
+            self.crowd.update(game_clock.step_seconds)
 
-    # draw floor tiles across the screen
-    def draw_tiled_floor(self, screen):
+    # draw floor tiles over the given world area
+    def draw_tiled_floor(self, surface, area):
         tw, th = self.floor_tile.get_size()
-        for y in range(0, self.height, th):
-            for x in range(0, self.width, tw):
-                screen.blit(self.floor_tile, (x, y))
+        for y in range(area.top - area.top % th, area.bottom, th):
+            for x in range(area.left - area.left % tw, area.right, tw):
+                surface.blit(self.floor_tile, (x - area.x, y - area.y))
+
+    # draw everything that does not change between frames onto one chunk of the floor
+    def build_chunk(self, surface, area):
+        surface.fill((0, 0, 0))
+        self.draw_tiled_floor(surface, area.clip(self.camera.world))
+
+        # casino tables and wardrobe
+        for obj in self.index.query(area):
+            if obj.image and obj.rect.colliderect(area):
+                surface.blit(assets.scaled(obj.image, obj.rect.size), (obj.rect.x - area.x, obj.rect.y - area.y))
 
     # draw the casino floor
     def draw(self, screen):
-        self.draw_tiled_floor(screen)
+        x, y = self.player.draw_pos()
+        self.camera.follow(x + self.player.size // 2, y + self.player.size // 2)
+        offset = self.camera.offset
+
+        # floor, tables and wardrobe from the chunks in view
+        self.layer.draw(screen, self.camera.rect)
 
-        # draw casino tables
-        bj = pygame.transform.scale(self.blackjack_img, (self.blackjack_rect.w, self.blackjack_rect.h))
-        ro = pygame.transform.scale(self.roulette_img, (self.roulette_rect.w, self.roulette_rect.h))
-        sl = pygame.transform.scale(self.slot_img, (self.slot_rect.w, self.slot_rect.h))
-        screen.blit(bj, self.blackjack_rect.topleft)
-        screen.blit(ro, self.roulette_rect.topleft)
-        screen.blit(sl, self.slot_rect.topleft)
+        # draw door
+        if self.door is not None and self.camera.visible(self.door.rect):
+            self.door.draw(screen, offset)
 
-        # draw door and wardrobe
-        self.door.draw(screen)
-        wardrobe_draw = pygame.transform.scale(self.wardrobe_img, (self.wardrobe_rect.w, self.wardrobe_rect.h))
-        screen.blit(wardrobe_draw, self.wardrobe_rect.topleft)
+        # draw the crowd
+        if self.crowd is not None:
+            self.crowd.draw(screen, self.camera.rect, game_clock.alpha)
 
         # draw player
-        self.player.draw(screen)
+        self.player.draw(screen, offset)
 
         # draw HUD (money and loan info)
-        hud_font = pygame.font.Font(None, 28)
-        screen.blit(hud_font.render(f"Money: ${self.player.money}", True, (255, 255, 255)), (10, 10))
+        screen.blit(fonts.render(f"Money: ${self.player.money}", 28, (255, 255, 255)), (10, 10))
         if self.player.loan_active():
             sec_left = self.player.loan_time_left_ms() // 1000
-            screen.blit(hud_font.render(f"Loan: ${self.player.loan_amount} - Time left: {sec_left}s", True, (255, 200, 50)), (10, 30))
+            screen.blit(fonts.render(f"Loan: ${self.player.loan_amount} - Time left: {sec_left}s", 28, (255, 200, 50)), (10, 30))
 
-        # draw help text
-        help_font = pygame.font.Font(None, 20)
-        screen.blit(help_font.render("Press E when near a table/machine/door.", True, (220, 220, 220)), (10, self.height - 30))
+        # draw help text, naming the object E would use
+        if self.focus is not None:
+            screen.blit(fonts.render(f"Press E: {self.focus.name}", 20, (255, 255, 255)), (10, self.height - 30))
+        else:
+            screen.blit(fonts.render("Press E when near a table/machine/door.", 20, (220, 220, 220)), (10, self.height - 30))
@@ -1,11 +1,18 @@
 import pygame
+from engine.dirty_rects import DirtyRects
+from engine.fonts import fonts
+from engine.state import State
 
-class GameOver:
+class GameOver(State):
     def __init__(self):
         # initialiseren van variables
         self.next_state = None
-        self.font_big = pygame.font.Font(None, 72)
-        self.font_small = pygame.font.Font(None, 32)
+        # static screen, only the first frame is presented
+        self.dirty = DirtyRects()
+
+    # static screen, waits for input
+    def is_idle(self):
+        return True
 
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN:
@@ -17,9 +24,9 @@ class GameOver:
     def draw(self, screen):
         screen.fill((10, 10, 10))
 
-        title = self.font_big.render("GAME OVER", True, (200, 30, 30))
-        reason = self.font_small.render("You failed to repay your loan and ended up in the street.", True, (220, 220, 220))
-        restart = self.font_small.render("Press R to restart or ESC to quit", True, (200, 200, 200))
+        title = fonts.render("GAME OVER", 72, (200, 30, 30))
+        reason = fonts.render("You failed to repay your loan and ended up in the street.", 32, (220, 220, 220))
+        restart = fonts.render("Press R to restart or ESC to quit", 32, (200, 200, 200))
 
         screen.blit(title, (screen.get_width()//2 - title.get_width()//2, 200))
         screen.blit(reason, (screen.get_width()//2 - reason.get_width()//2, 300))
@@ -0,0 +1,53 @@
+import pygame
+from engine.fonts import fonts
+from engine.state import State
+from states.casino_floor import SCREEN_WIDTH, SCREEN_HEIGHT
+
+# loading screen shown while the preloader decodes the assets
+# afterwards every state is built (one per frame) before going to the casino floor
+
+
+class Loading(State):
+    def __init__(self, preloader, states, next_state="casino"):
+        super().__init__()
+        self.preloader = preloader
+        self.states = states
+        self.target = next_state
+        self.building = False
+        self.build_total = 0
+        self.dots = 0
+
+    def enter(self):
+        super().enter()
+        if self.preloader.start_time is None:
+            self.preloader.start()
+
+    def update(self):
+        self.preloader.pump()
+        self.dots = (self.dots + 1) % 60
+
+        # all images decoded: build the states with everything already in the cache
+        if self.preloader.done() and not self.building:
+            self.building = True
+            self.states.prepare_all()
+            self.build_total = len(self.states.pending)
+
+        if self.building and not self.states.pending:
+            print(f"Cold start: {self.preloader.elapsed_ms():.0f} ms to decode, "
+                  f"{pygame.time.get_ticks()} ms until ready")
+            self.next_state = self.target
+
+    def draw(self, screen):
+        screen.fill((15, 15, 20))
+
+        text = "Loading" + "." * (self.dots // 20 + 1)
+        title = fonts.render(text, 40, (240, 240, 240))
+        screen.blit(title, (SCREEN_WIDTH // 2 - 80, SCREEN_HEIGHT // 2 - 60))
+
+        # progress bar, decoding is the first 80%, building the states the rest
+        progress = self.preloader.progress() * 0.8
+        if self.building and self.build_total:
+            progress += 0.2 * (self.build_total - len(self.states.pending)) / self.build_total
+        bar = pygame.Rect(200, SCREEN_HEIGHT // 2, 400, 20)
+        pygame.draw.rect(screen, (80, 80, 80), bar, 2)
+        pygame.draw.rect(screen, (255, 215, 0), (bar.x + 3, bar.y + 3, int((bar.w - 6) * progress), bar.h - 6))
@@ -0,0 +1,113 @@
+import random
+import numpy as np
+from engine.asset_cache import assets
+from states.skins import list_skins
+
+# crowd of wandering NPC gamblers on the casino floor
+# every NPC is a row in a set of numpy arrays (position, velocity, direction, animation),
+# one update moves them all at once and one Surface.blits call draws the ones in view
+# from a frame table shared by all NPCs with the same skin
+
+# sprite sheet rows: down, right, up, left (same sheets as the player)
+DIRECTIONS = np.array([[0, 1], [1, 0], [0, -1], [-1, 0]], dtype=np.float32)
+IDLE_COL = np.array([1, 1, 1, 0])
+# the crowd wears the first few skins, so its cost does not grow with the skin catalogue
+CROWD_SKINS = 4
+
+
+class Crowd:
+    # walkable map resolution in pixels
+    cell = 16
+    frame_delay_ms = 120
+
+    def __init__(self, count, world_size, obstacles=(), skins=None, size=40, speed=(40, 90), seed=None):
+        self.size = size
+        self.world_w, self.world_h = world_size
+        # own generator, seeded from the game's random so recorded sessions replay the same
+        self.rng = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+
+        # frames[skin * 16 + row * 4 + col], pre-scaled once and shared by every NPC
+        skins = skins or list_skins()[:CROWD_SKINS]
+        self.frames = []
+        for path in skins:
+            sheet = assets.image(path)
+            fw, fh = sheet.get_width() // 4, sheet.get_height() // 4
+            for row in range(4):
+                for col in range(4):
+                    self.frames.append(assets.frame(path, (col * fw, row * fh, fw, fh), (size, size)))
+
+        # blocked cells: tables, machines, the door
+        self.blocked = np.zeros((self.world_h // self.cell + 1, self.world_w // self.cell + 1), dtype=bool)
+        for rect in obstacles:
+            self.blocked[rect.top // self.cell:(rect.bottom - 1) // self.cell + 1,
+                         rect.left // self.cell:(rect.right - 1) // self.cell + 1] = True
+
+        n = count
+        self.count = n
+        self.pos = np.zeros((n, 2), dtype=np.float32)
+        self.spawn(np.arange(n))
+        self.prev_pos = self.pos.copy()
+        self.speed = self.rng.uniform(speed[0], speed[1], n).astype(np.float32)
+        self.direction = self.rng.integers(0, 4, n)
+        self.moving = np.zeros(n, dtype=bool)
+        self.skin = self.rng.integers(0, len(skins), n)
+        self.anim_ms = np.zeros(n, dtype=np.float32)
+        # seconds until the NPC picks a new direction (or stops for a while)
+        self.turn_in = self.rng.uniform(0, 3, n).astype(np.float32)
+
+    # place the given NPCs on random free spots
+    def spawn(self, idx):
+        for _ in range(20):
+            if len(idx) == 0:
+                return
+            self.pos[idx, 0] = self.rng.uniform(0, self.world_w - self.size, len(idx))
+            self.pos[idx, 1] = self.rng.uniform(0, self.world_h - self.size, len(idx))
+            idx = idx[self.is_blocked(self.pos[idx])]
+
+    # True for positions where the NPC's feet would stand on a blocked cell
+    def is_blocked(self, pos):
+        fx = ((pos[:, 0] + self.size / 2) // self.cell).astype(np.intp)
+        fy = ((pos[:, 1] + self.size - 1) // self.cell).astype(np.intp)
+        np.clip(fx, 0, self.blocked.shape[1] - 1, out=fx)
+        np.clip(fy, 0, self.blocked.shape[0] - 1, out=fy)
+        return self.blocked[fy, fx]
+
+    def update(self, dt):
+        self.prev_pos[:] = self.pos
+
+        # new plans: a direction, or standing still one time in four
+        self.turn_in -= dt
+        turning = np.flatnonzero(self.turn_in <= 0)
+        if len(turning):
+            self.direction[turning] = self.rng.integers(0, 4, len(turning))
+            self.moving[turning] = self.rng.random(len(turning)) < 0.75
+            self.turn_in[turning] = self.rng.uniform(1, 4, len(turning))
+
+        step = DIRECTIONS[self.direction] * (self.speed * self.moving * dt)[:, None]
+        new_pos = self.pos + step
+        # walls and tables stop the NPC, it turns around on the next step
+        out = ((new_pos[:, 0] < 0) | (new_pos[:, 1] < 0)
+               | (new_pos[:, 0] > self.world_w - self.size) | (new_pos[:, 1] > self.world_h - self.size))
+        stopped = out | self.is_blocked(new_pos)
+        self.pos[~stopped] = new_pos[~stopped]
+        self.turn_in[stopped] = 0
+
+        self.anim_ms += dt * 1000
+        self.anim_ms[~self.moving] = 0
+
+    # draw the NPCs inside the camera view, back to front
+    def draw(self, screen, view, alpha=1.0):
+        pos = self.prev_pos + (self.pos - self.prev_pos) * alpha
+        visible = np.flatnonzero((pos[:, 0] > view.left - self.size) & (pos[:, 0] < view.right)
+                                 & (pos[:, 1] > view.top - self.size) & (pos[:, 1] < view.bottom))
+        if len(visible) == 0:
+            return
+        visible = visible[np.argsort(pos[visible, 1], kind="stable")]
+
+        col = np.where(self.moving[visible], (self.anim_ms[visible] // self.frame_delay_ms).astype(np.intp) % 4,
+                       IDLE_COL[self.direction[visible]])
+        frame_idx = self.skin[visible] * 16 + self.direction[visible] * 4 + col
+        xs = pos[visible, 0].astype(np.intp) - view.x
+        ys = pos[visible, 1].astype(np.intp) - view.y
+        frames = self.frames
+        screen.blits([(frames[i], (x, y)) for i, x, y in zip(frame_idx.tolist(), xs.tolist(), ys.tolist())], doreturn=False)
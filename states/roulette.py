@@ -1,32 +1,114 @@
 import pygame
-import random
+import numpy as np
 from states.casino_floor import Player, SCREEN_WIDTH
 from ui.dialogue_box import DialogueBox
+from engine.dirty_rects import DirtyRects
+from engine.fonts import fonts
+from engine.rng import rng
+from engine.state import State
 
-class Roulette:
+# european wheel in pocket order
+WHEEL = [
+    0, 32, 15, 19, 4, 21, 2, 25, 17,
+    34, 6, 27, 13, 36, 11, 30, 8,
+    23, 10, 5, 24, 16, 33, 1, 20,
+    14, 31, 9, 22, 18, 29, 7, 28,
+    12, 35, 3, 26
+]
+
+RED_NUMBERS = {
+    1,3,5,7,9,12,14,16,18,
+    19,21,23,25,27,30,32,34,36
+}
+
+# settlement rules shared by the table and the batch engine
+# every bet is a row in WIN_TABLE: red, black, even, odd, then one row per single number
+# WIN_TABLE[row, number] tells if the bet wins, PAYOUTS[row] is the return including the stake
+BET_ROWS = {"red": 0, "black": 1, "even": 2, "odd": 3, "number": 4}
+
+_numbers = np.arange(37)
+_red = np.isin(_numbers, list(RED_NUMBERS))
+WIN_TABLE = np.vstack([
+    _red,
+    (_numbers != 0) & ~_red,
+    (_numbers != 0) & (_numbers % 2 == 0),
+    _numbers % 2 == 1,
+    _numbers[:, None] == _numbers[None, :],
+])
+PAYOUTS = np.array([2, 2, 2, 2] + [36] * 37)
+
+
+# row in WIN_TABLE for one bet
+def bet_row(bet_type, bet_value=None):
+    if bet_type == "number":
+        if bet_value is None or not 0 <= bet_value <= 36:
+            raise ValueError(f"single number bet needs a number between 0 and 36, got {bet_value}")
+        return BET_ROWS["number"] + bet_value
+    return BET_ROWS[bet_type]
+
+
+# rows in WIN_TABLE for arrays of bets
+def bet_rows(bet_types, bet_values=None):
+    bet_types = np.asarray(bet_types)
+    if bet_values is None:
+        bet_values = np.zeros(bet_types.shape, dtype=np.int64)
+    bet_values = np.asarray(bet_values, dtype=np.int64)
+
+    kinds, inverse = np.unique(bet_types, return_inverse=True)
+    rows = np.array([BET_ROWS[kind] for kind in kinds])[inverse]
+    is_number = (kinds == "number")[inverse]
+    if np.any(is_number & ((bet_values < 0) | (bet_values > 36))):
+        raise ValueError("single number bets need a number between 0 and 36")
+    return rows + np.where(is_number, bet_values, 0)
+
+
+# resolve arrays of bets against one wheel draw each, returns the numbers and net results
+def settle_batch(bet_types, bet_values, amounts, seed=None, wheel=WHEEL):
+    rows = bet_rows(bet_types, bet_values)
+    amounts = np.broadcast_to(np.asarray(amounts, dtype=np.int64), rows.shape)
+    rng = np.random.default_rng(seed)
+
+    numbers = np.asarray(wheel)[rng.integers(len(wheel), size=rows.shape)]
+    wins = WIN_TABLE[rows, numbers]
+    net = np.where(wins, amounts * (PAYOUTS[rows] - 1), -amounts)
+    return {"numbers": numbers, "wins": wins, "net": net}
+
+
+# exact expected value and variance of the net result per unit staked
+def bet_stats(bet_type, bet_value=None, wheel=WHEEL):
+    row = bet_row(bet_type, bet_value)
+    p_win = float(np.mean(WIN_TABLE[row, wheel]))
+    payout = int(PAYOUTS[row])
+    ev = p_win * payout - 1
+    variance = p_win * payout ** 2 - (p_win * payout) ** 2
+    return {"p_win": p_win, "payout": payout, "ev": ev, "house_edge": -ev, "variance": variance}
+
+
+class Roulette(State):
     def __init__(self, player: Player = None):
         # initialiseren van variables
         self.player = player 
         self.next_state = None
-        self.dialogue = DialogueBox()
+        self.dialogue = DialogueBox(pause_group="loan")
         self.queued_action = None 
 
-        self.wheel = [
-            0, 32, 15, 19, 4, 21, 2, 25, 17,
-            34, 6, 27, 13, 36, 11, 30, 8,
-            23, 10, 5, 24, 16, 33, 1, 20,
-            14, 31, 9, 22, 18, 29, 7, 28,
-            12, 35, 3, 26
-        ]
-
-        self.red_numbers = {
-            1,3,5,7,9,12,14,16,18,
-            19,21,23,25,27,30,32,34,36
-        }
+        self.wheel = WHEEL
+        # the table's own random stream
+        self.rng = rng.stream("roulette")
+        self.red_numbers = RED_NUMBERS
 
         self.bet_amount = 100
         self.message = "Press E to place a bet, ESC to exit."
 
+        # regions that changed since the last presented frame
+        self.dirty = DirtyRects()
+
+    # bet size is kept between visits, open menus and queued results are not
+    def enter(self):
+        super().enter()
+        self.dialogue.close()
+        self.queued_action = None
+
     def handle_event(self, event):
         if self.dialogue.visible:
             self.dialogue.handle_event(event)
@@ -107,26 +189,12 @@ class Roulette:
             return
 
         self.player.money -= self.bet_amount
-        result = random.choice(self.wheel)
-
-        win = False
-        payout = 0
-
-        if bet_type == "red":
-            win = result in self.red_numbers
-            payout = 2
-        elif bet_type == "black":
-            win = result != 0 and result not in self.red_numbers
-            payout = 2
-        elif bet_type == "even":
-            win = result != 0 and result % 2 == 0
-            payout = 2
-        elif bet_type == "odd":
-            win = result % 2 == 1
-            payout = 2
-        elif bet_type == "number":
-            win = result == bet_value
-            payout = 36
+        result = self.rng.choice(self.wheel)
+
+        # same rule table as the batch engine
+        row = bet_row(bet_type, bet_value)
+        win = bool(WIN_TABLE[row, result])
+        payout = int(PAYOUTS[row])
 
         if win:
             winnings = self.bet_amount * payout
@@ -142,30 +210,48 @@ class Roulette:
         self.queued_action = queued_action
         # end borrowed code
 
-    def update(self):
-        if self.player.loan_overdue():
-            self.next_state = "game_over"
+    # resolve many bets at once with this table's wheel, e.g. for bankroll curves
+    def spin_batch(self, bet_types, bet_values, amounts, seed=None):
+        return settle_batch(bet_types, bet_values, amounts, seed, self.wheel)
+
+    # exact odds of one bet type with this table's wheel
+    def bet_stats(self, bet_type, bet_value=None):
+        return bet_stats(bet_type, bet_value, self.wheel)
 
+    # idle unless a queued dialogue is about to open
+    def is_idle(self):
+        return self.queued_action is None or self.dialogue.visible
+
+    # the loan countdown in the HUD
+    def next_deadline(self):
+        return self.player.next_loan_event_ms()
+
+    def update(self):
         if not self.dialogue.visible and self.queued_action:
             self.queued_action()
             self.queued_action = None
 
     def draw(self, screen):
         screen.fill((43, 146, 115))
-        font = pygame.font.Font(None, 28)
-        title_font = pygame.font.Font(None, 40)
 
-        title = title_font.render("Roulette Table", True, (255, 255, 255))
+        title = fonts.render("Roulette Table", 40, (255, 255, 255))
         screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 40))
 
-        screen.blit(font.render(self.message, True, (230, 230, 230)), (200, 90))
-        screen.blit(font.render(f"Bet: ${self.bet_amount}", True, (255,255,255)), (10, 90))
-        screen.blit(font.render(f"Money: ${self.player.money}", True, (255, 255, 255)), (10, 10))
+        self.dirty.track("message", self.message, screen.blit(fonts.render(self.message, 28, (230, 230, 230)), (200, 90)))
+        bet_text = f"Bet: ${self.bet_amount}"
+        self.dirty.track("bet", bet_text, screen.blit(fonts.render(bet_text, 28, (255,255,255)), (10, 90)))
+        money_text = f"Money: ${self.player.money}"
+        self.dirty.track("money", money_text, screen.blit(fonts.render(money_text, 28, (255, 255, 255)), (10, 10)))
+        loan_text = None
+        loan_rect = None
         if self.player.loan_active():
             sec_left = self.player.loan_time_left_ms() // 1000
-            screen.blit(font.render(f"Loan: ${self.player.loan_amount} - Time left: {sec_left}s", True, (255, 200, 50)), (10, 30))
+            loan_text = f"Loan: ${self.player.loan_amount} - Time left: {sec_left}s"
+            loan_rect = screen.blit(fonts.render(loan_text, 28, (255, 200, 50)), (10, 30))
+        self.dirty.track("loan", loan_text, loan_rect)
 
         pygame.draw.circle(screen, (0, 0, 0), (400, 320), 140)
         pygame.draw.circle(screen, (200, 0, 0), (400, 320), 130)
 
         self.dialogue.draw(screen)
+        self.dirty.track("dialogue", self.dialogue.state_key(), self.dialogue.rect)
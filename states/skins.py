@@ -0,0 +1,18 @@
+import glob
+import os
+
+# character skins, every png in the skins folder is a 4x4 sprite sheet like the player's
+
+SKIN_DIR = "assets/player/skins"
+
+
+# numbered sheets sort by number (2.png before 10.png), other names come after them
+def _skin_key(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return (0, int(name), "") if name.isdigit() else (1, 0, name)
+
+
+# every skin sheet in the skins folder
+def list_skins(directory=SKIN_DIR):
+    paths = glob.glob(os.path.join(directory, "*.png"))
+    return [p.replace(os.sep, "/") for p in sorted(paths, key=_skin_key)]
@@ -1,22 +1,89 @@
 import pygame
-import random
+import numpy as np
 from states.casino_floor import Player, SCREEN_WIDTH
 from ui.dialogue_box import DialogueBox
-
-class SlotMachine:
+from engine.dirty_rects import DirtyRects
+from engine.fonts import fonts
+from engine.rng import rng
+from engine.scheduler import scheduler
+from engine.state import State
+
+# headless math for the slot machine, shared by SlotMachine.simulate
+# reel_weights has one weight list per reel, aligned with symbols
+
+
+# exact hit frequency, RTP and variance per spin from the reel weights
+def exact_stats(symbols, reel_weights, paytable, spin_cost):
+    probs = [np.asarray(w, dtype=np.float64) / np.sum(w) for w in reel_weights]
+    pays = np.array([paytable.get(s, 0) for s in symbols], dtype=np.float64) / spin_cost
+
+    # chance that every reel shows the same symbol
+    p_match = np.prod(probs, axis=0)
+    hit_frequency = float(np.sum(p_match[pays > 0]))
+    rtp = float(np.sum(p_match * pays))
+    variance = float(np.sum(p_match * pays ** 2) - rtp ** 2)
+    return {"hit_frequency": hit_frequency, "rtp": rtp, "variance": variance}
+
+
+# monte carlo spins in chunks, returns the same figures as exact_stats
+def simulate_spins(symbols, reel_weights, paytable, spin_cost, n_spins, seed=None, chunk_size=1_000_000):
+    rng = np.random.default_rng(seed)
+    cumulative = [np.cumsum(w) / np.sum(w) for w in reel_weights]
+    pays = np.array([paytable.get(s, 0) for s in symbols], dtype=np.float64) / spin_cost
+
+    hits = 0
+    total = 0.0
+    total_sq = 0.0
+    done = 0
+    while done < n_spins:
+        n = min(chunk_size, n_spins - done)
+        # one symbol index per reel per spin
+        stops = [np.searchsorted(cum, rng.random(n), side="right") for cum in cumulative]
+        match = np.ones(n, dtype=bool)
+        for reel in stops[1:]:
+            match &= reel == stops[0]
+        returns = np.where(match, pays[stops[0]], 0.0)
+
+        hits += int(np.count_nonzero(returns))
+        total += float(returns.sum())
+        total_sq += float(np.dot(returns, returns))
+        done += n
+
+    rtp = total / n_spins
+    return {
+        "spins": n_spins,
+        "hit_frequency": hits / n_spins,
+        "rtp": rtp,
+        "variance": total_sq / n_spins - rtp ** 2,
+    }
+
+
+class SlotMachine(State):
     def __init__(self, player: Player = None):
         # initialiseren van variables
         self.player = player
         self.next_state = None
-        self.dialogue = DialogueBox()
+        self.dialogue = DialogueBox(pause_group="loan")
 
         self.symbols = ["CHERRY", "LEMON", "BELL", "DIAMOND"]
         self.reels = ["?", "?", "?"]
 
+        # weight of every symbol on each of the 3 reels and the payout for 3 of a kind
+        self.reel_weights = [[1, 1, 1, 1] for _ in range(3)]
+        self.paytable = {"CHERRY": 100, "LEMON": 150, "BELL": 300, "DIAMOND": 1000}
+
         self.spin_cost = 50
+        # the machine's own random stream
+        self.rng = rng.stream("slot")
         self.message = "Press SPACE to spin ($50). ESC to exit."
         self.spinning = False
-        self.spin_end_time = 0
+
+        # regions that changed since the last presented frame
+        self.dirty = DirtyRects()
+
+    def enter(self):
+        super().enter()
+        self.dialogue.close()
 
     def handle_event(self, event):
         if self.dialogue.visible:
@@ -34,13 +101,11 @@ class SlotMachine:
     def show_help(self):
         lines = [
             "Goal: Spin the reels and match all three symbols.",
-            "Symbols & Payouts:",
-            "- CHERRY   : $100",
-            "- LEMON    : $150",
-            "- BELL     : $300",
-            "- DIAMOND : $1000",
+            "Symbols & Payouts:"]
+        lines += [f"- {symbol} : ${self.paytable.get(symbol, 0)}" for symbol in self.symbols]
+        lines += [
             "Rules:",
-            "- Each spin costs $50",
+            f"- Each spin costs ${self.spin_cost}",
             "- You win only if all 3 symbols match",
             "- Winnings are added instantly"]
         choices = ["Close"]
@@ -54,54 +119,70 @@ class SlotMachine:
 
         self.player.money -= self.spin_cost
         self.spinning = True
-        self.spin_end_time = pygame.time.get_ticks() + 800
+        scheduler.call_later(800, self.finish_spin)
         self.message = "Spinning..."
 
     def finish_spin(self):
-        self.reels = [random.choice(self.symbols) for _ in range(3)]
+        self.reels = [self.rng.weighted_choice(self.symbols, w) for w in self.reel_weights]
         self.spinning = False
         self.check_win()
 
     def check_win(self):
         if self.reels.count(self.reels[0]) == 3:
             symbol = self.reels[0]
-            payout = {"CHERRY": 100, "LEMON": 150, "BELL": 300, "DIAMOND": 1000}.get(symbol, 0)
+            payout = self.paytable.get(symbol, 0)
             self.player.money += payout
             self.message = f"3x {symbol}! You won ${payout}!"
         else:
             self.message = "No match. You lost."
 
-    def update(self):
-        if self.spinning and pygame.time.get_ticks() >= self.spin_end_time:
-            self.finish_spin()
+    # headless simulation of many spins with the current reels and paytable
+    # the exact figures are included so both can be checked against each other
+    def simulate(self, n_spins, seed=None):
+        result = simulate_spins(self.symbols, self.reel_weights, self.paytable, self.spin_cost, n_spins, seed)
+        exact = exact_stats(self.symbols, self.reel_weights, self.paytable, self.spin_cost)
+        result["exact_hit_frequency"] = exact["hit_frequency"]
+        result["exact_rtp"] = exact["rtp"]
+        result["exact_variance"] = exact["variance"]
+        return result
+
+    # the reels do not move while spinning, the spin end is a scheduler timer
+    def is_idle(self):
+        return True
 
-        if self.player.loan_overdue():
-            self.next_state = "game_over"
+    # the loan countdown in the HUD
+    def next_deadline(self):
+        return self.player.next_loan_event_ms()
 
     def draw(self, screen):
         screen.fill((20, 20, 20))
-        font_big = pygame.font.Font(None, 64)
-        font = pygame.font.Font(None, 28)
 
-        title = font_big.render("SLOT MACHINE", True, (255, 255, 0))
+        title = fonts.render("SLOT MACHINE", 64, (255, 255, 0))
         screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 40))
 
         # reels
+        self.dirty.track("reels", tuple(self.reels), pygame.Rect(260, 250, 280, 80))
         for i, symbol in enumerate(self.reels):
             x = 260 + i * 100
             y = 250
             pygame.draw.rect(screen, (80,80,80), (x, y, 80, 80))
-            text = font.render(symbol, True, (255,255,255))
+            text = fonts.render(symbol, 28, (255,255,255))
             screen.blit(text, (x + 40 - text.get_width()//2, y + 40 - text.get_height()//2))
 
         # HUD
-        screen.blit(font.render(f"Bet: ${self.spin_cost}", True, (255,255,255)), (10, 90))
-        screen.blit(font.render(f"Money: ${self.player.money}", True, (255,255,255)), (10, 10))
-        screen.blit(font.render(self.message, True, (200,200,200)), (200, 360))
+        screen.blit(fonts.render(f"Bet: ${self.spin_cost}", 28, (255,255,255)), (10, 90))
+        money_text = f"Money: ${self.player.money}"
+        self.dirty.track("money", money_text, screen.blit(fonts.render(money_text, 28, (255,255,255)), (10, 10)))
+        self.dirty.track("message", self.message, screen.blit(fonts.render(self.message, 28, (200,200,200)), (200, 360)))
 
+        loan_text = None
+        loan_rect = None
         if self.player.loan_active():
             sec_left = self.player.loan_time_left_ms()//1000
-            screen.blit(font.render(f"Loan: ${self.player.loan_amount} - Time left: {sec_left}s", True, (255,200,50)), (10, 30))
+            loan_text = f"Loan: ${self.player.loan_amount} - Time left: {sec_left}s"
+            loan_rect = screen.blit(fonts.render(loan_text, 28, (255,200,50)), (10, 30))
+        self.dirty.track("loan", loan_text, loan_rect)
         
         self.dialogue.draw(screen)
+        self.dirty.track("dialogue", self.dialogue.state_key(), self.dialogue.rect)
 
@@ -1,32 +1,50 @@
+import os
 import pygame
+from engine.dirty_rects import DirtyRects
+from engine.thumb_atlas import ThumbAtlas, idle_frame
+from engine.fonts import fonts
+from engine.state import State
 from states.casino_floor import SCREEN_WIDTH, SCREEN_HEIGHT, Player
+from states.skins import list_skins
 
-class Wardrobe:
+# idle frame thumbnails of every skin, rebuilt only for skins that changed
+THUMB_ATLAS = "cache/skin_thumbs.png"
+
+class Wardrobe(State):
     def __init__(self, player: Player = None):
         # initialiseren van variables
         self.player = player
         self.next_state = None
 
-        # gets every asset from skin
-        self.skins = [f"assets/player/skins/{i}.png" for i in range(1, 17)]
+        # gets every skin in the skins folder
+        self.skins = list_skins()
         self.selected = 0
 
-        # initialzing font
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 22)
 
-        # some variables for the grid
+        # some variables for the grid, one page at a time
         self.cols = 5
+        self.rows = 4
         self.cell_size = 96
         self.start_x = 80
         self.start_y = 140
 
+        # only the grid and footer change when the selection moves
+        self.dirty = DirtyRects()
+
+        # previews come from the atlas, the full sheet is only loaded when a skin is equipped
+        self.thumbs = ThumbAtlas(self.skins, THUMB_ATLAS, idle_frame)
+
+    @property
+    def per_page(self):
+        return self.cols * self.rows
 
-        # load the preview for the skins
-        self.thumbs = []
-        for path in self.skins:
-            img = pygame.image.load(path).convert_alpha()
-            self.thumbs.append(pygame.transform.scale(img, (64, 64)))
+    @property
+    def page(self):
+        return self.selected // self.per_page
+
+    @property
+    def pages(self):
+        return max(1, (len(self.skins) + self.per_page - 1) // self.per_page)
 
         # event handler for possible events
     def handle_event(self, event):
@@ -58,25 +76,35 @@ class Wardrobe:
                 nxt = self.selected - self.cols
                 if nxt >= 0:
                     self.selected = nxt
-    # veiligheidscheck
-    def update(self):
-        if self.player.loan_overdue():
-            self.next_state = "game_over"
+
+            elif event.key == pygame.K_PAGEDOWN:
+                self.selected = min(len(self.skins) - 1, self.selected + self.per_page)
+
+            elif event.key == pygame.K_PAGEUP:
+                self.selected = max(0, self.selected - self.per_page)
+    # only input changes anything
+    def is_idle(self):
+        return True
 
     # draw
     def draw(self, screen):
         screen.fill((25, 25, 30))
 
-        title = self.font.render("Wardrobe - Choose your character", True, (240, 240, 240))
+        title = fonts.render("Wardrobe - Choose your character", 36, (240, 240, 240))
         screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 40))
 
-        hint = self.small_font.render("Arrows = select | E / Enter = equip | ESC = back", True, (200, 200, 200))
+        hint = fonts.render("Arrows = select | E / Enter = equip | ESC = back", 22, (200, 200, 200))
         screen.blit(hint, (SCREEN_WIDTH // 2 - hint.get_width() // 2, 80))
 
-        # grid tekenen
-        for i, img in enumerate(self.thumbs):
-            row = i // self.cols
-            col = i % self.cols
+        # grid tekenen, alleen de huidige pagina
+        first = self.page * self.per_page
+        last = min(len(self.skins), first + self.per_page)
+        grid_rect = pygame.Rect(self.start_x - 8, self.start_y - 8, self.cols * self.cell_size + 16, self.rows * self.cell_size + 16)
+        self.dirty.track("grid", self.selected, grid_rect)
+        for i in range(first, last):
+            img = self.thumbs.thumb(i)
+            row = (i - first) // self.cols
+            col = (i - first) % self.cols
 
             x = self.start_x + col * self.cell_size
             y = self.start_y + row * self.cell_size
@@ -86,5 +114,8 @@ class Wardrobe:
                 pygame.draw.rect(screen,(255, 215, 0), (x - 6, y - 6, 76, 76), 3)
             screen.blit(img, (x, y))
 
-        footer = self.small_font.render(f"Selected skin: {self.selected + 1}.png", True, (220, 220, 220))
-        screen.blit(footer, (10, SCREEN_HEIGHT - 30))
\ No newline at end of file
+        footer_text = f"Selected skin: {os.path.basename(self.skins[self.selected])}"
+        if self.pages > 1:
+            footer_text += f"  |  Page {self.page + 1}/{self.pages} (PgUp / PgDn)"
+        footer = fonts.render(footer_text, 22, (220, 220, 220))
+        self.dirty.track("footer", self.selected, screen.blit(footer, (10, SCREEN_HEIGHT - 30)))
\ No newline at end of file
@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+# headless rendering benchmark for every state
+# runs a fixed number of update/draw cycles per state with the dummy video driver and
+# a scripted player, and writes the timings to a json file that can be compared later
+#
+# usage (from the repository root):
+#   python -m tools.benchmark --save benchmarks/baseline.json
+#   python -m tools.benchmark --baseline benchmarks/baseline.json
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+WIDTH, HEIGHT = 800, 600
+
+
+# player that walks a fixed square instead of reading the keyboard
+def make_scripted_player():
+    from states.casino_floor import Player
+    from engine.clock import game_clock
+
+    class ScriptedPlayer(Player):
+        route = ("down", "right", "up", "left")
+        steps_per_leg = 30
+
+        def __init__(self):
+            super().__init__()
+            self.step = 0
+            self.money = 10 ** 9
+
+        def handle_input(self):
+            self.direction = self.route[(self.step // self.steps_per_leg) % len(self.route)]
+            self.moving = True
+            dx, dy = {"down": (0, 1), "right": (1, 0), "up": (0, -1), "left": (-1, 0)}[self.direction]
+            self.x += dx * self.speed * game_clock.step_seconds
+            self.y += dy * self.speed * game_clock.step_seconds
+            self.step += 1
+
+    return ScriptedPlayer()
+
+
+# floor of 20x15 screens filled with tables and 500 NPCs, to check that frame cost does not grow with the map
+def make_large_floor():
+    from engine.tile_map import FloorMap
+
+    images = ("blackjack_casino_floor.png", "roulette_casino_floor.png", "slots_casino_floor.png")
+    objects = []
+    for y in range(100, 9000, 300):
+        for x in range(60, 16000, 400):
+            name = images[(x // 400 + y // 300) % len(images)]
+            objects.append({"name": name, "image": f"assets/background/{name}", "rect": [x, y, 140, 90], "target": "casino"})
+    return FloorMap({
+        "size": [16000, 9000],
+        "crowd": 500,
+        "tile": "assets/background/casino_floor_tile.png",
+        "door": {"pos": [360, 0], "target": "bank", "entrance": [380, 40]},
+        "objects": objects,
+    })
+
+
+# the normal floor with 500 NPCs, all of them in view
+def make_crowded_floor():
+    from engine.tile_map import load_map
+    from states.casino_floor import FLOOR_MAP
+
+    floor_map = load_map(FLOOR_MAP)
+    floor_map.crowd = 500
+    return floor_map
+
+
+# state name -> (constructor, keys pressed every `every` frames)
+def benchmark_states():
+    from states.casino_floor import CasinoFloor
+    from states.bank import Bank
+    from states.roulette import Roulette
+    from states.blackjack import Blackjack
+    from states.slot_machine import SlotMachine
+    from states.wardrobe import Wardrobe
+    from states.game_over import GameOver
+
+    return {
+        "CasinoFloor": (lambda player: CasinoFloor(player=player), ()),
+        "CasinoFloorLarge": (lambda player: CasinoFloor(player=player, floor_map=make_large_floor()), ()),
+        "CasinoFloorCrowd": (lambda player: CasinoFloor(player=player, floor_map=make_crowded_floor()), ()),
+        "Bank": (lambda player: Bank(player=player), ()),
+        "Roulette": (lambda player: Roulette(player=player), (pygame.K_e, pygame.K_DOWN, pygame.K_RETURN)),
+        "Blackjack": (lambda player: Blackjack(player=player), (pygame.K_SPACE, pygame.K_s)),
+        "SlotMachine": (lambda player: SlotMachine(player=player), (pygame.K_SPACE,)),
+        "Wardrobe": (lambda player: Wardrobe(player=player), (pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT, pygame.K_UP)),
+        "GameOver": (lambda player: GameOver(), ()),
+    }
+
+
+# one simulation step per frame, like the game at 60 fps
+def run_frames(state, screen, frames, keys, every, timings=None):
+    from engine.clock import game_clock
+    from engine.scheduler import scheduler
+
+    for i in range(frames):
+        if keys and i % every == 0:
+            key = keys[(i // every) % len(keys)]
+            state.handle_event(pygame.event.Event(pygame.KEYDOWN, key=key))
+
+        t0 = time.perf_counter()
+        game_clock.step()
+        scheduler.run()
+        state.update()
+        # a state asking to leave is kept on screen for the benchmark
+        state.next_state = None
+        t1 = time.perf_counter()
+        state.draw(screen)
+        t2 = time.perf_counter()
+        pygame.display.flip()
+        t3 = time.perf_counter()
+
+        if timings is not None:
+            timings["update"].append((t1 - t0) * 1000)
+            timings["draw"].append((t2 - t1) * 1000)
+            timings["present"].append((t3 - t2) * 1000)
+            timings["frame"].append((t3 - t0) * 1000)
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "mean_ms": statistics.fmean(values),
+        "p50_ms": values[len(values) // 2],
+        "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))],
+    }
+
+
+def bench_state(name, factory, keys, screen, frames, alloc_frames, every=20):
+    player = make_scripted_player()
+    state = factory(player)
+    state.enter()
+    # warm up caches (assets, text, static layers) before measuring
+    run_frames(state, screen, 30, keys, every)
+
+    timings = {"update": [], "draw": [], "present": [], "frame": []}
+    start = time.perf_counter()
+    run_frames(state, screen, frames, keys, every, timings)
+    elapsed = time.perf_counter() - start
+
+    # allocations are measured in a separate, shorter pass because tracemalloc is slow
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    transient = []
+    for _ in range(alloc_frames):
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        run_frames(state, screen, 1, keys, every)
+        _, peak = tracemalloc.get_traced_memory()
+        transient.append(peak - current)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    # the benchmark's own bookkeeping is not part of the frame
+    ignore = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "filename")
+    new_blocks = sum(max(0, stat.count_diff) for stat in stats)
+
+    return {
+        "fps": frames / elapsed,
+        "update": summarize(timings["update"]),
+        "draw": summarize(timings["draw"]),
+        "present": summarize(timings["present"]),
+        "frame": summarize(timings["frame"]),
+        "alloc_bytes_per_frame": statistics.fmean(transient),
+        "retained_blocks_per_frame": new_blocks / alloc_frames,
+    }
+
+
+# states whose mean frame time got slower than the baseline by more than `tolerance`
+# differences below min_delta_ms are treated as noise
+def compare(results, baseline, tolerance, min_delta_ms=0.05):
+    regressions = []
+    for name, result in results["states"].items():
+        old = baseline.get("states", {}).get(name)
+        if old is None:
+            continue
+        for phase in ("update", "draw", "frame"):
+            new_ms = result[phase]["mean_ms"]
+            old_ms = old[phase]["mean_ms"]
+            if new_ms > old_ms * (1 + tolerance) and new_ms - old_ms > min_delta_ms:
+                regressions.append(f"{name}.{phase}: {old_ms:.3f} -> {new_ms:.3f} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless rendering benchmark for every state.")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--alloc-frames", type=int, default=60)
+    parser.add_argument("--states", nargs="*", help="only run these states")
+    parser.add_argument("--save", help="write the results to this json file")
+    parser.add_argument("--baseline", help="compare against this json file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before a regression is reported")
+    parser.add_argument("--min-delta", type=float, default=0.05, help="ignore slowdowns smaller than this many ms")
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "frames": args.frames,
+        },
+        "states": {},
+    }
+    for name, (factory, keys) in benchmark_states().items():
+        if args.states and name not in args.states:
+            continue
+        result = bench_state(name, factory, keys, screen, args.frames, args.alloc_frames)
+        results["states"][name] = result
+        print(f"{name:16} {result['fps']:8.0f} fps  update {result['update']['mean_ms']:.3f} ms  "
+              f"draw {result['draw']['mean_ms']:.3f} ms  alloc {result['alloc_bytes_per_frame'] / 1024:.1f} KiB/frame  "
+              f"retained {result['retained_blocks_per_frame']:.1f} blocks/frame")
+
+    pygame.quit()
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
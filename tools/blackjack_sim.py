@@ -0,0 +1,154 @@
+import argparse
+import math
+import random
+import time
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+
+from states.blackjack_odds import Hand, Rules, dealer_should_hit, settle
+from states.blackjack_shoe import Shoe
+
+# headless blackjack simulator for comparing rule variants
+# plays the same rounds as the table in states/blackjack.py across a process pool,
+# every chunk of hands gets its own shoe and an independent seeded random stream
+#
+# usage (from the repository root):
+#   python -m tools.blackjack_sim --hands 10000000 --decks 6 --h17 --bj-payout 1.5
+
+
+# one round with the table rules, returns the net result per unit bet
+def play_round(shoe, rules, stand_on, stats):
+    shoe.start_round()
+    # same deal order as the table: two to the player, then two to the dealer
+    player = Hand([shoe.draw(), shoe.draw()])
+    dealer = Hand([shoe.draw(), shoe.draw()])
+
+    if player.is_blackjack():
+        stats["naturals"] += 1
+        return rules.blackjack_payout
+
+    # player strategy: hit until stand_on is reached
+    while player.value < stand_on:
+        player.add(shoe.draw())
+
+    if player.is_bust():
+        stats["player_busts"] += 1
+        return -1.0
+
+    while dealer_should_hit(dealer.value, dealer.soft, rules):
+        dealer.add(shoe.draw())
+    if dealer.is_bust():
+        stats["dealer_busts"] += 1
+
+    outcome = settle(player, dealer)
+    if outcome == 0:
+        stats["pushes"] += 1
+    return float(outcome)
+
+
+# plays one chunk of hands in a worker process and returns its aggregates
+def run_chunk(args):
+    rules, hands, seed, stand_on = args
+    rng = random.Random(seed)
+    shoe = Shoe(rules.num_decks, rules.penetration, rng)
+
+    stats = {"hands": hands, "total": 0.0, "total_sq": 0.0, "naturals": 0,
+             "player_busts": 0, "dealer_busts": 0, "pushes": 0}
+    total = 0.0
+    total_sq = 0.0
+    for _ in range(hands):
+        net = play_round(shoe, rules, stand_on, stats)
+        total += net
+        total_sq += net * net
+    stats["total"] = total
+    stats["total_sq"] = total_sq
+    return stats
+
+
+# sum the aggregates of all chunks and add EV, variance and a 95% confidence interval
+def merge(chunks):
+    merged = {}
+    for chunk in chunks:
+        for key, value in chunk.items():
+            merged[key] = merged.get(key, 0) + value
+
+    n = merged["hands"]
+    ev = merged["total"] / n
+    variance = merged["total_sq"] / n - ev * ev
+    half_width = 1.96 * math.sqrt(variance / n)
+    return {
+        "hands": n,
+        "ev": ev,
+        "house_edge": -ev,
+        "variance": variance,
+        "ci95": (ev - half_width, ev + half_width),
+        "player_bust_rate": merged["player_busts"] / n,
+        "dealer_bust_rate": merged["dealer_busts"] / n,
+        "push_rate": merged["pushes"] / n,
+        "natural_rate": merged["naturals"] / n,
+    }
+
+
+# the chunks only depend on hands and chunk_size, so a seed gives the same hands on any machine
+# and with any number of workers, the pool only decides how many chunks run at the same time.
+# the chunk sums are merged in whatever order imap_unordered returns them, float rounding
+# can make the last digits differ between runs
+def simulate(rules, hands, workers=None, seed=None, stand_on=17, chunk_size=50_000):
+    if hands < 1:
+        raise ValueError("simulate needs at least one hand")
+    workers = workers or cpu_count()
+    # one independent stream per chunk, spawned from the master seed
+    n_chunks = math.ceil(hands / chunk_size)
+    children = np.random.SeedSequence(seed).spawn(n_chunks)
+    sizes = [hands // n_chunks + (1 if i < hands % n_chunks else 0) for i in range(n_chunks)]
+    jobs = [(rules, size, int(child.generate_state(2, np.uint64)[0]), stand_on)
+            for size, child in zip(sizes, children) if size]
+
+    workers = min(workers, len(jobs))
+    if workers == 1:
+        chunks = [run_chunk(job) for job in jobs]
+    else:
+        with Pool(workers) as pool:
+            chunks = list(pool.imap_unordered(run_chunk, jobs))
+    return merge(chunks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate blackjack rule variants.")
+    parser.add_argument("--hands", type=int, default=1_000_000)
+    parser.add_argument("--decks", type=int, default=1)
+    parser.add_argument("--h17", action="store_true", help="dealer hits soft 17")
+    parser.add_argument("--bj-payout", type=float, default=1.0, help="profit per unit bet for a natural")
+    parser.add_argument("--penetration", type=float, default=0.75)
+    parser.add_argument("--stand-on", type=int, default=17, help="player hits below this total")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    if args.hands < 1:
+        parser.error("--hands must be at least 1")
+    try:
+        Shoe(args.decks, args.penetration)
+    except ValueError as e:
+        parser.error(str(e))
+
+    rules = Rules(args.h17, args.bj_payout, args.decks, args.penetration)
+    start = time.perf_counter()
+    result = simulate(rules, args.hands, args.workers, args.seed, args.stand_on)
+    elapsed = time.perf_counter() - start
+
+    print(rules)
+    low, high = result["ci95"]
+    print(f"hands:            {result['hands']}")
+    print(f"EV per unit:      {result['ev']:+.5f}  (95% CI {low:+.5f} .. {high:+.5f})")
+    print(f"house edge:       {result['house_edge']:.3%}")
+    print(f"variance:         {result['variance']:.4f}")
+    print(f"player bust rate: {result['player_bust_rate']:.3%}")
+    print(f"dealer bust rate: {result['dealer_bust_rate']:.3%}")
+    print(f"push rate:        {result['push_rate']:.3%}")
+    print(f"naturals:         {result['natural_rate']:.3%}")
+    print(f"{result['hands'] / elapsed:,.0f} hands/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,18 @@
 import pygame
+from engine.fonts import fonts
+from engine.profiler import profiler
+from engine.scheduler import scheduler
 
 class DialogueBox:
     padding = 12          # space between text and box edges
     line_spacing = 6      # space between lines of text
     choice_spacing = 4    # space between choices
     max_length = 300      # maximum height of the dialogue box
+    max_per_column = 10   # choices in one column
+    max_columns = 4       # longer choice lists scroll in a single column
+    background = (30, 30, 30)
 
-    def __init__(self, width=700, height=140, font=None):
+    def __init__(self, width=700, height=140, font_size=28, font_face=None, pause_group=None):
         self.width = width
         self.base_height = height
         self.height = height
@@ -20,13 +26,19 @@ class DialogueBox:
         self.callback = None       
         # index of currently selected choice        
         self.selected = 0          
-        # use given font, otherwise default pygame font
-        if font is not None:
-            self.font = font
-        else:
-            self.font = pygame.font.Font(None, 28)
+        # font from the shared registry, default pygame font unless a face is given
+        self.font_size = font_size
+        self.font_face = font_face
+        self.font = fonts.get(font_size, font_face)
         # rect object representing dialogue box area
         self.rect = None           
+        # first visible choice row when the choices scroll
+        self.scroll = 0
+        # box with text and unselected choices, rendered once per open (and per scroll)
+        self.surface = None
+        # scheduler group that stands still while the box is open (None pauses nothing)
+        self.pause_group = pause_group
+        self.pausing = False
 
     def open(self, lines, choices=None, callback=None):
         # ensure lines is a list
@@ -38,20 +50,70 @@ class DialogueBox:
         self.choices = choices
         self.callback = callback
         self.selected = 0
+        self.scroll = 0
         self.visible = True
+        if self.pause_group is not None and not self.pausing:
+            self.pausing = True
+            scheduler.pause(self.pause_group)
+        self.layout()
+
+    # place the choices in columns, or in one scrolling column when they do not fit
+    def layout(self):
+        font_h = self.font.get_height()
+        row_h = font_h + self.choice_spacing
+        count = len(self.choices) if self.choices else 0
+        # choices start below the rendered lines, which are a bit taller than the font height
+        self.choices_y = self.padding + sum(
+            fonts.render(line, self.font_size, (255,255,255), self.font_face).get_height() + self.line_spacing
+            for line in self.lines)
+
+        self.columns = 1
+        self.rows = count
+        if count:
+            room = max(1, (self.max_length - self.padding - self.choices_y) // row_h)
+            per_column = min(self.max_per_column, room)
+            if count <= per_column * self.max_columns:
+                self.columns = (count + per_column - 1) // per_column
+                self.rows = min(count, per_column)
+            else:
+                self.rows = per_column
+        self.scrolling = count > self.rows * self.columns
 
-        # calculate required height for lines + choices
-        line_count = len(self.lines)
-        choice_count = len(self.choices) if self.choices is not None else 0
-        needed_height = (2*self.padding + line_count*(self.font.get_height() + self.line_spacing) + choice_count*(self.font.get_height() + self.choice_spacing))
         # limit height between base height and max length
+        # the highlighted choice is the tallest thing in a row
+        choice_h = max((self.render_choice(i, True).get_height() for i in range(count)), default=0)
+        needed_height = self.choices_y + max(0, self.rows - 1) * row_h + choice_h + self.padding
         self.height = min(max(self.base_height, needed_height), self.max_length)
+        # the lines and one row of choices are never cut off, even past max_length
+        self.height = max(self.height, self.choices_y + choice_h + self.padding)
+        self.surface = None
 
     def close(self):
         self.visible = False
         self.lines = []
         self.choices = None
         self.callback = None
+        self.surface = None
+        if self.pausing:
+            self.pausing = False
+            scheduler.resume(self.pause_group)
+
+    # everything that changes what the box looks like, used for dirty rect tracking
+    def state_key(self):
+        if not self.visible:
+            return None
+        choices = tuple(self.choices) if self.choices is not None else None
+        return (tuple(self.lines), choices, self.selected, self.scroll, self.height)
+
+    # keep the selected choice inside the visible window
+    def scroll_to_selected(self):
+        if not self.scrolling:
+            return
+        scroll = min(self.scroll, self.selected)
+        scroll = max(scroll, self.selected - self.rows + 1)
+        if scroll != self.scroll:
+            self.scroll = scroll
+            self.surface = None
 
     def handle_event(self, event):
         if not self.visible: 
@@ -63,9 +125,11 @@ class DialogueBox:
                 if event.key == pygame.K_UP: 
                     # move selection up and wrap around
                     self.selected = (self.selected - 1) % len(self.choices)
+                    self.scroll_to_selected()
                 if event.key == pygame.K_DOWN: 
                     # move selection down and wrap around
                     self.selected = (self.selected + 1) % len(self.choices)
+                    self.scroll_to_selected()
                 if event.key in [pygame.K_RETURN, pygame.K_KP_ENTER]:
                     # confirm selection
                     if self.callback: 
@@ -75,47 +139,78 @@ class DialogueBox:
                 # no choices
                 self.close()
 
+    # position of a choice inside the box, None when it is scrolled out of view
+    def choice_pos(self, i):
+        if self.scrolling:
+            col, row = 0, i - self.scroll
+            if not 0 <= row < self.rows:
+                return None
+        else:
+            col, row = i // self.rows, i % self.rows
+        x = self.padding + col * (self.width // self.columns)
+        y = self.choices_y + row * (self.font.get_height() + self.choice_spacing)
+        return x, y
+
+    def render_choice(self, i, selected):
+        if selected:
+            return fonts.render("X " + self.choices[i], self.font_size, (255, 255, 120), self.font_face)
+        return fonts.render(" " + self.choices[i], self.font_size, (200, 200, 200), self.font_face)
+
+    # background, border, text lines and the visible choices without highlight
+    def build_surface(self):
+        surface = pygame.Surface((self.width, self.height)).convert()
+        box = surface.get_rect()
+        pygame.draw.rect(surface, self.background, box)
+        pygame.draw.rect(surface, (220,220,220), box, 2)
+
+        # draw text lines
+        line_y = self.padding
+        for line in self.lines:
+            surf = fonts.render(line, self.font_size, (255,255,255), self.font_face)
+            surface.blit(surf, (self.padding, line_y))
+            line_y += surf.get_height() + self.line_spacing
+
+        # draw the choices in view
+        if self.choices:
+            first = self.scroll if self.scrolling else 0
+            last = min(len(self.choices), first + self.rows * self.columns)
+            for i in range(first, last):
+                surface.blit(self.render_choice(i, False), self.choice_pos(i))
+
+            # arrows when there are more choices above or below
+            if self.scrolling:
+                arrow_x = self.width - self.padding - 12
+                if first > 0:
+                    surface.blit(fonts.render("^", self.font_size, (200, 200, 200), self.font_face), (arrow_x, self.choices_y))
+                if last < len(self.choices):
+                    surface.blit(fonts.render("v", self.font_size, (200, 200, 200), self.font_face),
+                                 (arrow_x, self.height - self.padding - self.font.get_height()))
+        return surface
+
     def draw(self, screen):
         if not self.visible: 
             return
+        with profiler.section("DialogueBox.draw"):
+            self.draw_box(screen)
 
+    def draw_box(self, screen):
         # center horizontally
         sw, sh = screen.get_size()
         x = (sw - self.width) // 2
         y = sh - self.height - 20
         self.rect = pygame.Rect(x, y, self.width, self.height)
 
-        # draw background rectangle
-        pygame.draw.rect(screen, (30,30,30), self.rect)
-        # draw border
-        pygame.draw.rect(screen, (220,220,220), self.rect, 2)
-        # y position for first line
-        line_y = y + self.padding 
-
-        # draw text lines
-        for line in self.lines:
-            surf = self.font.render(line, True, (255,255,255))
-            screen.blit(surf, (x + self.padding, line_y))
-            line_y += surf.get_height() + self.line_spacing
+        if self.surface is None:
+            self.surface = self.build_surface()
+        screen.blit(self.surface, self.rect)
 
-        # draw choices if any
+        # only the selected choice is drawn every frame, over its plain version
         if self.choices:
-            # max number of choices per column
-            max_per_column = 10  
-            # calculate number of columns needed
-            num_columns = (len(self.choices) + max_per_column - 1) // max_per_column
-            for i, choice in enumerate(self.choices):
-                col = i // max_per_column
-                row = i % max_per_column
-                # x and y position for this choice
-                choice_x = x + self.padding + col * (self.width // num_columns)
-                choice_y = line_y + row * (self.font.get_height() + self.choice_spacing)
-                # highlight the selected choice
-                if i == self.selected:
-                    prefix = "X "
-                    color = (255, 255, 120)
-                else:
-                    prefix = " "
-                    color = (200, 200, 200)
-                surf = self.font.render(prefix + choice, True, color)
-                screen.blit(surf, (choice_x, choice_y))
+            pos = self.choice_pos(self.selected)
+            if pos is not None:
+                plain = self.render_choice(self.selected, False)
+                highlight = self.render_choice(self.selected, True)
+                cell = pygame.Rect(x + pos[0], y + pos[1], max(plain.get_width(), highlight.get_width()),
+                                   max(plain.get_height(), highlight.get_height()))
+                screen.fill(self.background, cell.clip(self.rect.inflate(-4, -4)))
+                screen.blit(highlight, cell.topleft)